@@ -8,7 +8,6 @@ Email: siva82kb@gmail.com
 
 
 import sys
-import numpy as np
 
 from qtpluto import QtPluto
 
@@ -18,10 +17,22 @@ from PyQt5 import (
 from enum import Enum
 
 import plutodefs as pdef
+import plutowindowutils as pwu
 from plutodataviewwindow import PlutoDataViewWindow
 from ui_plutocalib import Ui_CalibrationWindow
 
 
+# Module level constants
+UI_UPDATE_INTERVAL = 50  # UI refresh timer interval (ms)
+HAND_DISTANCE_FORMAT = "%5.2fcm"  # Format of the hand distance label
+
+# Events and calibration status codes used on every PLUTO packet.
+NEWDATA = pdef.PlutoEvents.NEWDATA
+RELEASED = pdef.PlutoEvents.RELEASED
+YESCALIB = pdef.CalibrationStatus["YESCALIB"]
+NOCALIB = pdef.CalibrationStatus["NOCALIB"]
+
+
 class PlutoCalibStates(Enum):
     WAIT_FOR_ZERO_SET = 0
     WAIT_FOR_ROM_SET = 1
@@ -31,6 +42,8 @@ class PlutoCalibStates(Enum):
 
 
 class PlutoCalibrationStateMachine():
+    __slots__ = ("_state", "_pluto", "_stateactions", "_stateaction")
+
     def __init__(self, plutodev):
         self._state = PlutoCalibStates.WAIT_FOR_ZERO_SET
         self._pluto = plutodev
@@ -41,6 +54,10 @@ class PlutoCalibrationStateMachine():
             PlutoCalibStates.CALIB_ERROR: self._calib_error,
             PlutoCalibStates.CALIB_DONE: self._calib_done
         }
+        # Action for the current state. This is updated only on state
+        # transitions, so that the state action need not be looked up for
+        # every event.
+        self._stateaction = self._stateactions[self._state]
     
     @property
     def state(self):
@@ -49,53 +66,59 @@ class PlutoCalibrationStateMachine():
     def run_statemachine(self, event, mech):
         """Execute the state machine depending on the given even that has occured.
         """
-        self._stateactions[self._state](event, mech)
+        self._stateaction(event, mech)
+
+    def _set_state(self, state):
+        self._state = state
+        self._stateaction = self._stateactions[state]
     
     def _zero_set(self, event, mech):
         # Check if the button release event has happened.
-        if event == pdef.PlutoEvents.RELEASED:
+        if event is RELEASED:
             # Send the calibration command to the device.
             self._pluto.calibrate(mech)
             return
         # Check of the calibration is done.
-        if (event == pdef.PlutoEvents.NEWDATA
-            and self._pluto.calibration == pdef.CalibrationStatus["YESCALIB"]):
-            self._state = PlutoCalibStates.WAIT_FOR_ROM_SET
+        if (event is NEWDATA
+            and self._pluto.calibration == YESCALIB):
+            self._set_state(PlutoCalibStates.WAIT_FOR_ROM_SET)
     
     def _rom_set(self, event, mech):
         # Check of the calibration is done.
-        if self._pluto.calibration == pdef.CalibrationStatus["NOCALIB"]:
-            self._state = PlutoCalibStates.WAIT_FOR_ZERO_SET
+        if self._pluto.calibration == NOCALIB:
+            self._set_state(PlutoCalibStates.WAIT_FOR_ZERO_SET)
             return
         # Check if the button release event has happened.
-        if event == pdef.PlutoEvents.RELEASED:
+        if event is RELEASED:
             # Check if the ROM is acceptable.
-            _romcheck = (-self._pluto.angle >= 0.9 * pdef.PlutoAngleRanges[mech]
-                         and -self._pluto.angle <= 1.1 * pdef.PlutoAngleRanges[mech])
+            _minrom, _maxrom = pdef.PlutoCalibROMLimits[mech]
+            _romcheck = _minrom <= -self._pluto.angle <= _maxrom
             if _romcheck:
                 # Everything looks good. Calibration is complete.
-                self._state = PlutoCalibStates.WAIT_FOR_CLOSE
+                self._set_state(PlutoCalibStates.WAIT_FOR_CLOSE)
             else:
                 # ROM is not acceptable. Calibration Error.
-                self._state = PlutoCalibStates.CALIB_ERROR
+                self._set_state(PlutoCalibStates.CALIB_ERROR)
     
     def _close(self, event, mech):
         # Check if the button release event has happened.
-        if event == pdef.PlutoEvents.RELEASED:
+        if event is RELEASED:
             # Calibration all done.
-            self._state = PlutoCalibStates.CALIB_DONE
+            self._set_state(PlutoCalibStates.CALIB_DONE)
     
     def _calib_error(self, event, mech):
-        self._pluto.calibrate("NOMECH")
-        if event == pdef.PlutoEvents.RELEASED:
+        # Reset the calibration till the device confirms it.
+        if self._pluto.calibration != NOCALIB:
+            self._pluto.calibrate("NOMECH")
+        if event is RELEASED:
             # Calibration all done.
-            self._state = PlutoCalibStates.CALIB_DONE
+            self._set_state(PlutoCalibStates.CALIB_DONE)
 
     def _calib_done(self, event, mech):
         pass
 
 
-class PlutoCalibrationWindow(QtWidgets.QMainWindow):
+class PlutoCalibrationWindow(pwu.TimedUIUpdate, QtWidgets.QMainWindow):
     """
     Class for handling the operation of the PLUTO calibration window.
     """
@@ -116,10 +139,15 @@ class PlutoCalibrationWindow(QtWidgets.QMainWindow):
         # Initialize the state machine.
         self._smachine = PlutoCalibrationStateMachine(self._pluto)
 
+        # Last text set on the labels, and the state they were set for.
+        self._lbltext = {}
+        self._laststate = None
+
+        # UI refresh timer.
+        self._init_ui_timer(UI_UPDATE_INTERVAL)
+
         # Set to NOMECH to start with
         self._pluto.calibrate("NOMECH")
-        # self._pluto.reset_calibration("NOMECH")
-        # self._pluto.reset_calibration("NOMECH")
 
         # Attach callbacks
         self.pluto.newdata.connect(self._callback_pluto_newdata)
@@ -129,6 +157,7 @@ class PlutoCalibrationWindow(QtWidgets.QMainWindow):
         self.update_ui()
 
         # Open the PLUTO data viewer window for sanity
+        self._devdatawnd = None
         if dataviewer:
             # Open the device data viewer by default.
             self._open_devdata_viewer()
@@ -150,29 +179,47 @@ class PlutoCalibrationWindow(QtWidgets.QMainWindow):
     # Update UI
     #
     def update_ui(self):
-        # Update based on the current state of the Calib statemachine
-        if self._smachine.state == PlutoCalibStates.WAIT_FOR_ZERO_SET:
-            self.ui.lblCalibStatus.setText("Not done.")
-            self.ui.lblHandDistance.setText("- NA- ")
-            self.ui.lblInstruction2.setText("Press the PLUTO button set zero.")
-        elif self._smachine.state == PlutoCalibStates.WAIT_FOR_ROM_SET:
-            self.ui.lblCalibStatus.setText("Zero set.")
-            self.ui.lblHandDistance.setText(f"{self.pluto.hocdisp:5.2f}cm")
-            self.ui.lblInstruction2.setText("Press the PLUTO button set ROM.")
-        elif self._smachine.state == PlutoCalibStates.WAIT_FOR_CLOSE:
-            self.ui.lblCalibStatus.setText("All Done!")
-            self.ui.lblHandDistance.setText(f"{self.pluto.hocdisp:5.2f}cm")
-            self.ui.lblInstruction2.setText("Press the PLUTO button to close window.")
-        elif self._smachine.state == PlutoCalibStates.CALIB_ERROR:
-            self.ui.lblCalibStatus.setText("Error!")
-            self.ui.lblInstruction2.setText("Press the PLUTO button to close window.")
+        # Update based on the current state of the Calib statemachine. The
+        # state labels change only on state transitions.
+        _state = self._smachine.state
+        if _state is not self._laststate:
+            self._laststate = _state
+            self._update_state_labels(_state)
+        self._update_position_label(_state)
+
+    def _update_state_labels(self, state):
+        if state is PlutoCalibStates.WAIT_FOR_ZERO_SET:
+            self._set_label_text(self.ui.lblCalibStatus, "Not done.")
+            self._set_label_text(self.ui.lblHandDistance, "- NA- ")
+            self._set_label_text(self.ui.lblInstruction2, "Press the PLUTO button set zero.")
+        elif state is PlutoCalibStates.WAIT_FOR_ROM_SET:
+            self._set_label_text(self.ui.lblCalibStatus, "Zero set.")
+            self._set_label_text(self.ui.lblInstruction2, "Press the PLUTO button set ROM.")
+        elif state is PlutoCalibStates.WAIT_FOR_CLOSE:
+            self._set_label_text(self.ui.lblCalibStatus, "All Done!")
+            self._set_label_text(self.ui.lblInstruction2, "Press the PLUTO button to close window.")
+        elif state is PlutoCalibStates.CALIB_ERROR:
+            self._set_label_text(self.ui.lblCalibStatus, "Error!")
+            self._set_label_text(self.ui.lblInstruction2, "Press the PLUTO button to close window.")
         else:
-            try:
+            if self._devdatawnd is not None:
                 self._devdatawnd.close()
-            except:
-                pass
             self.close()
+
+    def _update_position_label(self, state):
+        # The hand distance is shown once zero is set.
+        if (state is PlutoCalibStates.WAIT_FOR_ROM_SET
+            or state is PlutoCalibStates.WAIT_FOR_CLOSE):
+            self._set_label_text(self.ui.lblHandDistance,
+                                 HAND_DISTANCE_FORMAT % self.pluto.hocdisp)
     
+    def _set_label_text(self, label, text):
+        """Sets the label text only if it is different from the current one.
+        """
+        if self._lbltext.get(label) != text:
+            label.setText(text)
+            self._lbltext[label] = text
+
     #
     # Device Data Viewer Functions 
     #
@@ -186,15 +233,15 @@ class PlutoCalibrationWindow(QtWidgets.QMainWindow):
     # 
     def _callback_pluto_newdata(self):
         self._smachine.run_statemachine(
-            pdef.PlutoEvents.NEWDATA,
+            NEWDATA,
             self._mechanism
         )
-        self.update_ui()
+        self._uidirty = True
 
     def _callback_pluto_btn_released(self):
         # Run the statemachine
         self._smachine.run_statemachine(
-            pdef.PlutoEvents.RELEASED,
+            RELEASED,
             self._mechanism
         )
         self.update_ui()
@@ -8,7 +8,6 @@ Email: siva82kb@gmail.com
 
 
 import sys
-import numpy as np
 
 from qtpluto import QtPluto
 
@@ -16,13 +15,57 @@ from PyQt5 import (
     QtWidgets,
 )
 from PyQt5.QtGui import QKeyEvent
-from enum import Enum
 
 import plutodefs as pdef
+import plutowindowutils as pwu
 from ui_plutodataview import Ui_DevDataWindow
 
 
-class PlutoDataViewWindow(QtWidgets.QMainWindow):
+# Module level constants
+UI_UPDATE_INTERVAL = 100  # UI refresh timer interval (ms)
+
+# Codes of the diagnostics data type and of a calibrated device.
+DIAGNOSTICS_CODE = pdef.OutDataType["DIAGNOSTICS"]
+YESCALIB_CODE = pdef.CalibrationStatus["YESCALIB"]
+
+# Display text lines and templates. The templates are keyed by
+# (calibrated, diagnostics).
+DISP_LINES_HEAD = (
+    "PLUTO Data [fr: {framerate:4.1f}Hz]",
+    "----------",
+    "Time    : {time}",
+    "Status  : {datatype} | {controltype} | {calib}",
+    "Error   : {errname}",
+    "Mech    : {mech:<6s} | Calib   : {calib}",
+    "Actd    : {actuated:<6d} | Button  : {button}",
+    "",
+    "~ SENSOR DATA ~",
+)
+DISP_LINE_ANGLE = "Angle   : {angle:-07.2f}deg"
+DISP_LINE_ANGLE_HOC = "Angle   : {angle:-07.2f}deg [{hocdisp:05.2f}cm]"
+DISP_LINES_CONTROL = (
+    "Torque  : {torque:3.1f}Nm",
+    "Control : {control:3.1f}",
+    "Target  : {target:3.1f}",
+)
+DISP_LINES_DIAG = (
+    "Err     : {err:3.1f}",
+    "ErrDiff : {errordiff:3.1f}",
+    "ErrSum  : {errorsum:3.1f}",
+)
+DISP_TMPL = {
+    (_calib, _diag): "\n".join(
+        DISP_LINES_HEAD
+        + ((DISP_LINE_ANGLE_HOC if _calib else DISP_LINE_ANGLE),)
+        + DISP_LINES_CONTROL
+        + (DISP_LINES_DIAG if _diag else ())
+    )
+    for _calib in (False, True)
+    for _diag in (False, True)
+}
+
+
+class PlutoDataViewWindow(pwu.TimedUIUpdate, QtWidgets.QMainWindow):
     """
     Class for handling the operation of the PLUTO data viewer window.
     """
@@ -47,11 +90,14 @@ class PlutoDataViewWindow(QtWidgets.QMainWindow):
         else:
             self._pluto.start_sensorstream()
 
-        # Display counter
-        self._dispcount = 0
+        # Time stamp of the last displayed packet.
+        self._last_disp_time = None
+
+        # UI refresh timer, run only while the window is shown.
+        self._init_ui_timer()
 
-        # Attach callbacks
-        self.pluto.newdata.connect(self._callback_pluto_newdata)
+        # The newdata callback is attached only while the window is shown.
+        self._newdata_connected = False
 
         # Update UI.
         self.update_ui()
@@ -60,48 +106,66 @@ class PlutoDataViewWindow(QtWidgets.QMainWindow):
     def pluto(self):
         return self._pluto
     
+    # Overriding the showEvent and hideEvent methods
+    def showEvent(self, event):
+        # Attach the newdata callback and show the latest data.
+        if not self._newdata_connected:
+            self.pluto.newdata.connect(self._callback_pluto_newdata)
+            self._newdata_connected = True
+        self._uitimer.start(UI_UPDATE_INTERVAL)
+        self.update_ui()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        # Nothing to display when hidden or minimized.
+        if self._newdata_connected:
+            self.pluto.newdata.disconnect(self._callback_pluto_newdata)
+            self._newdata_connected = False
+        self._uitimer.stop()
+        super().hideEvent(event)
+
     #
     # Update UI
     #
     def update_ui(self):
+        _p = self._pluto
+        # Nothing to do if the displayed packet has not changed.
+        _time = _p.time
+        if _time is not None and _time == self._last_disp_time:
+            return
+        self._last_disp_time = _time
         # Check if new data is available
-        if self.pluto.is_data_available() is False:
-            self.ui.textDevData.setText("No data available.")
+        if _p.is_data_available() is False:
+            self.ui.textDevData.setPlainText("No data available.")
             return
         # New data available. Format and display
-        _dispdata = [
-            f"PLUTO Data [fr: {self.pluto.framerate():4.1f}Hz]",
-            "----------",
-            f"Time    : {self.pluto.time}"
-        ]
-        _statusstr = ' | '.join((pdef.get_name(pdef.OutDataType, self.pluto.datatype),
-                                 pdef.get_name(pdef.ControlType, self.pluto.controltype),
-                                 pdef.get_name(pdef.CalibrationStatus, self.pluto.calibration)))
-        _dispdata += [
-            f"Status  : {_statusstr}",
-            f"Error   : {pdef.get_name(pdef.ErrorTypes, self.pluto.error)}",
-            f"Mech    : {pdef.get_name(pdef.Mehcanisms, self.pluto.mechanism):<6s} | Calib   : {pdef.get_name(pdef.CalibrationStatus, self.pluto.calibration)}",
-            f"Actd    : {self.pluto.actuated:<6d} | Button  : {self.pluto.button}",
-            ""
-        ]
-        _dispdata += [
-            "~ SENSOR DATA ~",
-            f"Angle   : {self.pluto.angle:-07.2f}deg"
-            + (f" [{self.pluto.hocdisp:05.2f}cm]" if self.pluto.calibration == 1 else "")
-        ]
-        _dispdata += [
-            f"Torque  : {self.pluto.torque:3.1f}Nm",
-            f"Control : {self.pluto.control:3.1f}",
-            f"Target  : {self.pluto.target:3.1f}",
-        ]
+        _calib = _p.calibration
+        _datatype = _p.datatype
+        _vals = {
+            "framerate": _p.framerate(),
+            "time": _time,
+            "datatype": pdef.get_name(pdef.OutDataType, _datatype),
+            "controltype": pdef.get_name(pdef.ControlType, _p.controltype),
+            "calib": pdef.get_name(pdef.CalibrationStatus, _calib),
+            "errname": pdef.get_name(pdef.ErrorTypes, _p.error),
+            "mech": pdef.get_name(pdef.Mehcanisms, _p.mechanism),
+            "actuated": _p.actuated,
+            "button": _p.button,
+            "angle": _p.angle,
+            "torque": _p.torque,
+            "control": _p.control,
+            "target": _p.target,
+        }
+        _calib = _calib == YESCALIB_CODE
+        if _calib:
+            _vals["hocdisp"] = _p.hocdisp
         # Check if in DIAGNOSTICS mode.
-        if pdef.get_name(pdef.OutDataType, self.pluto.datatype) == "DIAGNOSTICS":
-            _dispdata += [
-                f"Err     : {self.pluto.error:3.1f}",
-                f"ErrDiff : {self.pluto.errordiff:3.1f}",
-                f"ErrSum  : {self.pluto.errorsum:3.1f}",
-            ]
-        self.ui.textDevData.setText('\n'.join(_dispdata))
+        _diag = _datatype == DIAGNOSTICS_CODE
+        if _diag:
+            _vals["err"] = _p.error
+            _vals["errordiff"] = _p.errordiff
+            _vals["errorsum"] = _p.errorsum
+        self.ui.textDevData.setPlainText(DISP_TMPL[(_calib, _diag)].format_map(_vals))
     
     #
     # Key release event
@@ -115,10 +179,7 @@ class PlutoDataViewWindow(QtWidgets.QMainWindow):
     # Signal Callbacks
     # ss
     def _callback_pluto_newdata(self):
-        self._dispcount += 1
-        self._dispcount %= 10
-        if self._dispcount == 0:
-            self.update_ui()
+        self._uidirty = True
 
 
 if __name__ == '__main__':
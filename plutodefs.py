@@ -6,13 +6,13 @@ Date: 25 July 2024
 Email: siva82kb@gmail.com
 """
 
-import numpy as np
-from enum import Enum
+import math
+from enum import Enum, IntEnum
 
 
 
 # Hand Openiong and Closing Mechanism Conversion Factor
-HOCScale = 3.97 * np.pi / 180
+HOCScale = 3.97 * math.pi / 180
 PLUTOMaxTorque = 1.0 #Nm
 
 class PlutoEvents(Enum):
@@ -20,58 +20,50 @@ class PlutoEvents(Enum):
     RELEASED = 1
     NEWDATA = 2
 
-ControlType = {
-    "NONE":     0x00,
-    "POSITION": 0x01,
-    "RESIST":   0x02,
-    "TORQUE":   0x03,
-}
-
-Mehcanisms = {
-    "WFE":    0x00,
-    "WUD":    0x01,
-    "WPS":    0x02,
-    "HOC":    0x03,
-    "NOMECH": 0x04,
-}
-
-OutDataType = {
-    "SENSORSTREAM": 0x00,
-    "CONTROLPARAM": 0x01,
-    "DIAGNOSTICS":  0x02,
-}
-
-InDataType = {
-    "GET_VERSION":        0x00,
-    "CALIBRATE":          0x01,
-    "START_STREAM":       0x02,
-    "STOP_STREAM":        0x03,
-    "SET_CONTROL_TYPE":   0x04,
-    "SET_CONTROL_TARGET": 0x05,
-    "SET_DIAGNOSTICS":    0x06,
-}
-
-ControlDetails = {
-    "POSITIONTGT":    0x08,
-    "FEEDFORWARDTGT": 0x20
-}
-
-ErrorTypes = {
-    "ANGSENSERR":   0x0001,
-    "VELSENSERR":   0x0002,
-    "TORQSENSERR":  0x0004,
-    "MCURRSENSERR": 0x0008,
-}
-
-OperationStatus = {
-    "NOERR":  0x00,
-    "YESERR": 0x01,
-}
-
-CalibrationStatus = {
-    "NOCALIB":  0x00,
-    "YESCALIB": 0x01,
-}
+class ControlType(IntEnum):
+    NONE     = 0x00
+    POSITION = 0x01
+    RESIST   = 0x02
+    TORQUE   = 0x03
+
+class Mehcanisms(IntEnum):
+    WFE    = 0x00
+    WUD    = 0x01
+    WPS    = 0x02
+    HOC    = 0x03
+    NOMECH = 0x04
+
+class OutDataType(IntEnum):
+    SENSORSTREAM = 0x00
+    CONTROLPARAM = 0x01
+    DIAGNOSTICS  = 0x02
+
+class InDataType(IntEnum):
+    GET_VERSION        = 0x00
+    CALIBRATE          = 0x01
+    START_STREAM       = 0x02
+    STOP_STREAM        = 0x03
+    SET_CONTROL_TYPE   = 0x04
+    SET_CONTROL_TARGET = 0x05
+    SET_DIAGNOSTICS    = 0x06
+
+class ControlDetails(IntEnum):
+    POSITIONTGT    = 0x08
+    FEEDFORWARDTGT = 0x20
+
+class ErrorTypes(IntEnum):
+    ANGSENSERR   = 0x0001
+    VELSENSERR   = 0x0002
+    TORQSENSERR  = 0x0004
+    MCURRSENSERR = 0x0008
+
+class OperationStatus(IntEnum):
+    NOERR  = 0x00
+    YESERR = 0x01
+
+class CalibrationStatus(IntEnum):
+    NOCALIB  = 0x00
+    YESCALIB = 0x01
 
 PlutoAngleRanges = {
     "WFE": 120,
@@ -80,6 +72,12 @@ PlutoAngleRanges = {
     "HOC": 140,
 }
 
+# Range of acceptable calibration ROM for each mechanism.
+PlutoCalibROMLimits = {
+    _mech: (0.9 * _range, 1.1 * _range)
+    for _mech, _range in PlutoAngleRanges.items()
+}
+
 PlutoTargetRanges = {
     "TORQUE":   [-PLUTOMaxTorque, PLUTOMaxTorque],
     "POSITION": [-135, 0],
@@ -90,10 +88,11 @@ PlutoSensorDataNumber = {
     "DIAGNOSTICS": 7,
 }
 
-def get_name(def_dict, code):
-    """Gets the name corresponding to the given code from the definition  dictionary.
+def get_name(def_enum, code):
+    """Gets the name corresponding to the given code from the code definition.
+    Returns None if the code is not defined.
     """
-    for name, value in def_dict.items():
-        if value == code:
-            return name
-    return None
\ No newline at end of file
+    try:
+        return def_enum(code).name
+    except ValueError:
+        return None
@@ -24,6 +24,7 @@ from PyQt5.QtWidgets import (
 )
 
 import plutoassessdef as passdef
+import plutowindowutils as pwu
 
 from plutodataviewwindow import PlutoDataViewWindow
 from plutocalibwindow import PlutoCalibrationWindow
@@ -34,7 +35,11 @@ from plutopropassesswindow import PlutoPropAssessWindow
 from ui_plutopropass import Ui_PlutoPropAssessor
 
 
-class PlutoPropAssesor(QtWidgets.QMainWindow, Ui_PlutoPropAssessor):
+# Module level constants
+UI_UPDATE_INTERVAL = 50  # UI refresh timer interval (ms)
+
+
+class PlutoPropAssesor(pwu.TimedUIUpdate, QtWidgets.QMainWindow, Ui_PlutoPropAssessor):
     """Main window of the PLUTO proprioception assessment program.
     """
     
@@ -71,6 +76,8 @@ class PlutoPropAssesor(QtWidgets.QMainWindow, Ui_PlutoPropAssessor):
         self.apptimer.timeout.connect(self._callback_app_timer)
         self.apptimer.start(1000)
         self.apptime = 0
+        # UI refresh timer.
+        self._init_ui_timer(UI_UPDATE_INTERVAL)
 
         # Attach callback to the buttons
         self.pbSubject.clicked.connect(self._callback_select_subject)
@@ -103,6 +110,8 @@ class PlutoPropAssesor(QtWidgets.QMainWindow, Ui_PlutoPropAssessor):
         # Update UI
         # A flag to disable the main window when another window is open.
         self._maindisable = False
+        # Last displayed state of the UI.
+        self._ui_cache = None
         self.update_ui()
     
     #
@@ -241,11 +250,11 @@ class PlutoPropAssesor(QtWidgets.QMainWindow, Ui_PlutoPropAssessor):
     def _callback_newdata(self):
         """Update the UI of the appropriate window.
         """
-        # Update data viewer window.
-        self.update_ui()
-
         # Update calibration status
         self._calib = (self.pluto.calibration == 1)
+
+        # Mark UI for update.
+        self._uidirty = True
             
     def _callback_btn_pressed(self):
         pass
@@ -297,6 +306,17 @@ class PlutoPropAssesor(QtWidgets.QMainWindow, Ui_PlutoPropAssessor):
     # UI Update function
     #
     def update_ui(self):
+        # Nothing to update if none of the displayed values have changed
+        # since the last update.
+        _uistate = (self._maindisable, self._subjid, self._datadir,
+                    self._calib, self._romdata["AROM"], self._romdata["PROM"],
+                    self.cbSubjectType.currentText(),
+                    self.cbLimb.currentText(),
+                    self.cbGripType.currentText())
+        if _uistate == self._ui_cache:
+            return
+        self._ui_cache = _uistate
+
         enbflag = self._maindisable is False and self._subjid is not None and self._calib is True
         # Disable buttons if needed.
         self.pbCalibration.setEnabled(self._maindisable is False)
@@ -9,7 +9,6 @@ Email: siva82kb@gmail.com
 
 
 import sys
-import inspect
 import numpy as np
 
 from qtpluto import QtPluto
@@ -23,14 +22,18 @@ from PyQt5.QtCore import (
 )
 import pyqtgraph as pg
 
-from enum import Enum
+from enum import Enum, IntEnum
 from datetime import datetime as dt
 
 import json
 import random
+import threading
+import time
 import winsound
 
 import plutodefs as pdef
+import plutowindowutils as pwu
+from plutotrialwriter import PlutoTrialDataWriter
 from ui_plutopropassessctrl import Ui_ProprioceptionAssessWindow
 from plutodataviewwindow import PlutoDataViewWindow
 import plutoassessdef as passdef
@@ -39,13 +42,30 @@ import plutoassessdef as passdef
 # Module level constants
 BEEP_FREQ = 2500  # Set Frequency To 2500 Hertz
 BEEP_DUR = 1000  # Set Duration To 1000 ms == 1 second
+TRIAL_WRITER_JOIN_TIMEOUT = 2.0  # Max. wait for the trial files on close (s)
+HOCDISP_TO_ANGLE = -1 / pdef.HOCScale  # Hand distance (cm) to HOC angle (deg)
+UI_UPDATE_INTERVAL = 50  # UI refresh timer interval (ms)
+# Row format for the trial data file.
+# time,status,error,mechanism,angle,hocdisp,torque,control,target,button,framerate,state
+TRIAL_DATA_ROW_FORMAT = "%s,%s,%s,%s,%0.3f,%0.3f,%0.3f,%0.3f,%0.3f,%s,%0.3f,%s\n"
+
+# Pens for the graph lines, shared by all proprioception assessment windows.
+CURR_POS_PEN = pg.mkPen(color = '#FFFFFF',width=1)
+AROM_PEN = pg.mkPen(color = '#FF8888',width=1, style=QtCore.Qt.DotLine)
+PROM_PEN = pg.mkPen(color = '#8888FF',width=1, style=QtCore.Qt.DotLine)
+TARGET_PEN = pg.mkPen(color = '#00FF00',width=2)
 
 
 # Some useful lambda functions
 del_time = lambda x: dt.now() - (dt.now() if x is None else x) 
 increment_time = lambda x : x + passdef.PROPASS_CTRL_TIMER_DELTA if x  >= 0 else -1
 clip = lambda x: min(max(0, x), 1)
-mjt = lambda x: np.polyval([6, -15, 10, 0, 0, 0], clip(x))
+
+
+def mjt(x):
+    # Minimum jerk profile 6x^5 - 15x^4 + 10x^3, evaluated in Horner form.
+    x = clip(x)
+    return x * x * x * (10 + x * (-15 + 6 * x))
 
 
 class PlutoPropAssessEvents(Enum):
@@ -62,7 +82,10 @@ class PlutoPropAssessEvents(Enum):
     ALL_TARGETS_DONE = 10
 
 
-class PlutoPropAssessStates(Enum):
+class PlutoPropAssessStates(IntEnum):
+    # Keep the "PlutoPropAssessStates.NAME" string used in the display.
+    __str__ = Enum.__str__
+
     PROP_DONE = 0
     WAIT_FOR_START = 1
     WAIT_FOR_HAPTIC_DISPAY_START = 2
@@ -77,7 +100,29 @@ class PlutoPropAssessStates(Enum):
     PROTOCOL_STOP = 9
 
 
+# The state handlers and STATE_TEXT are tuples indexed by the state value,
+# so the state values must run from 0 without gaps.
+if (sorted(_s.value for _s in PlutoPropAssessStates)
+    != list(range(len(PlutoPropAssessStates)))):
+    raise RuntimeError("PlutoPropAssessStates values must run from 0 without gaps.")
+
+# Display text of each state, indexed by the state value.
+STATE_TEXT = tuple(str(_s) for _s in sorted(PlutoPropAssessStates))
+
+# Bitmask of the states in which no target is displayed.
+NO_TARGET_STATES_MASK = (
+    (1 << PlutoPropAssessStates.WAIT_FOR_START)
+    | (1 << PlutoPropAssessStates.WAIT_FOR_HAPTIC_DISPAY_START)
+    | (1 << PlutoPropAssessStates.INTER_TRIAL_REST)
+    | (1 << PlutoPropAssessStates.PROTOCOL_STOP)
+    | (1 << PlutoPropAssessStates.PROP_DONE)
+)
+
+
 class PlutoPropAssessmentStateMachine():
+    __slots__ = ("_state", "_instruction", "_addn_info", "_protocol",
+                 "_pluto", "_stateactions")
+
     def __init__(self, plutodev, protocol):
         self._state = PlutoPropAssessStates.WAIT_FOR_START
         self._instruction = "Press the Start Button to start assessment."
@@ -87,7 +132,7 @@ class PlutoPropAssessmentStateMachine():
         # Indicates if both AROM and PROM have been done for this
         # particular instance of the statemachine.
         self._pluto = plutodev
-        self._stateactions = {
+        _stateactions = {
             PlutoPropAssessStates.WAIT_FOR_START: self._wait_for_start,
             PlutoPropAssessStates.WAIT_FOR_HAPTIC_DISPAY_START: self._wait_for_haptic_display_start,
             PlutoPropAssessStates.TRIAL_HAPTIC_DISPLAY_MOVING: self._trial_haptic_display_moving,
@@ -101,6 +146,10 @@ class PlutoPropAssessmentStateMachine():
             PlutoPropAssessStates.PROTOCOL_STOP: self._protocol_stop,
             PlutoPropAssessStates.PROP_DONE: self._protocol_done
         }
+        # Tuple of state actions indexed by the state value.
+        self._stateactions = tuple(
+            _stateactions[_s] for _s in sorted(_stateactions)
+        )
     
     @property
     def state(self):
@@ -241,7 +290,7 @@ class PlutoPropAssessmentStateMachine():
         return False
 
 
-class PlutoPropAssessWindow(QtWidgets.QMainWindow):
+class PlutoPropAssessWindow(pwu.TimedUIUpdate, QtWidgets.QMainWindow):
     """
     Class for handling the operation of the PLUTO proprioceptive assessment window.
     """
@@ -275,16 +324,23 @@ class PlutoPropAssessWindow(QtWidgets.QMainWindow):
         # Another timer for controlling the target position command to the robot.
         # We probably can get all this done with a single timer, but for the lack 
         # of time for an elegant solution, we will use an additional timer.
+        # The control timer advances the target trajectory by a fixed time
+        # step on every tick, so it uses a precise timer to limit jitter.
         self._ctrl_timer = QTimer()
+        self._ctrl_timer.setTimerType(QtCore.Qt.PreciseTimer)
         self._ctrl_timer.timeout.connect(self._callback_ctrl_timer)
+        # Timer for starting the assessment movement after the beep.
+        self._beep_timer = QTimer(self)
+        self._beep_timer.setSingleShot(True)
+        self._beep_timer.timeout.connect(self._start_trial_assessment_move)
         self._tgtctrl = {
             "time": -1,
             "init": 0,
             "final": 0,
             "curr": 0,
             "dur": 0,
-            "on_timer": 0,
-            "off_timer": 0
+            "span": 0,
+            "rate": 0
         }
 
         # Initialize protocol
@@ -307,7 +363,7 @@ class PlutoPropAssessWindow(QtWidgets.QMainWindow):
         self.ui.pbStartStopProtocol.clicked.connect(self._callback_propprotocol_startstop)
 
         # Define handlers for different states.
-        self._state_handlers = {
+        _state_handlers = {
             PlutoPropAssessStates.WAIT_FOR_START: self._handle_wait_for_start,
             PlutoPropAssessStates.WAIT_FOR_HAPTIC_DISPAY_START: self._handle_wait_for_haptic_display_start,
             PlutoPropAssessStates.TRIAL_HAPTIC_DISPLAY_MOVING: self._handle_trial_haptic_display_moving,
@@ -321,10 +377,21 @@ class PlutoPropAssessWindow(QtWidgets.QMainWindow):
             PlutoPropAssessStates.PROTOCOL_STOP: self._handle_protocol_stop,
             PlutoPropAssessStates.PROP_DONE: self._handle_protocol_done
         }
+        # Tuple of state handlers indexed by the state value.
+        self._state_handlers = tuple(
+            _state_handlers[_s] for _s in sorted(_state_handlers)
+        )
+
+        # Last displayed information text, and the values it was shown for.
+        self._lastinfotext = None
+        self._ui_cache = None
         
         # Update UI.
         self.update_ui()
 
+        # UI refresh timer.
+        self._init_ui_timer(UI_UPDATE_INTERVAL)
+
         # Initialize PLUTO control to NONE.
         self.pluto.set_control_type("NONE")
 
@@ -367,12 +434,21 @@ class PlutoPropAssessWindow(QtWidgets.QMainWindow):
         
         # Stop all timers.
         self._ctrl_timer.stop()
+        self._beep_timer.stop()
+        self._uitimer.stop()
         # Set device to no control.
         self.pluto.set_control_type("NONE")
         # Close file if open
-        if self._data['trialfhandle'] is not None:
-            self._data['trialfhandle'].flush()
-            self._data['trialfhandle'].close()
+        self._close_trial_file()
+        # Wait for the trial data files to be written and closed, but not
+        # longer than the timeout in all.
+        _endt = time.monotonic() + TRIAL_WRITER_JOIN_TIMEOUT
+        for _writer in self._data['trialwriters']:
+            _writer.join(max(0, _endt - time.monotonic()))
+            if _writer.is_alive():
+                print("Trial data file is still being written.")
+            elif _writer.error is not None:
+                print(f"Trial data file error: {_writer.error}")
         
         # Dettach signal callbacks
         self.pluto.newdata.disconnect(self._callback_pluto_newdata)
@@ -384,85 +460,85 @@ class PlutoPropAssessWindow(QtWidgets.QMainWindow):
     # Update UI
     #
     def update_ui(self):
+        # Nothing to draw when the window is hidden or minimized.
+        if not self.isVisible() or self.isMinimized():
+            return
         # Update the graph display
         # Update current hand position
-        if self.pluto.hocdisp is None:
+        # Read the hand position and state once for this update.
+        _pos = self._pluto.hocdisp
+        if _pos is None:
             return
-        self.ui.currPosLine1.setData(
-            [self.pluto.hocdisp, self.pluto.hocdisp],
-            [-30, 30]
-        )
-        self.ui.currPosLine2.setData(
-            [-self.pluto.hocdisp, -self.pluto.hocdisp],
-            [-30, 30]
-        )
+        _state = self._smachine.state
+        # Nothing to update if none of the displayed values have changed
+        # since the last update (hand position to the displayed 0.01cm, and
+        # the durations to their displayed resolution).
+        _uistate = (_state, round(_pos, 2), self._data['trialno'],
+                    round(self._time, 1),
+                    round(del_time(self._data['trial_strt_t']).total_seconds()),
+                    self._smachine.instruction)
+        if _uistate == self._ui_cache:
+            return
+        self._ui_cache = _uistate
+        _statetext = STATE_TEXT[_state]
+        self._cursors["currpos"].set_position(_pos)
         # Update target position when needed.
-        _checkstate = not (
-            self._smachine.state == PlutoPropAssessStates.WAIT_FOR_START
-            or self._smachine.state == PlutoPropAssessStates.WAIT_FOR_HAPTIC_DISPAY_START
-            or self._smachine.state == PlutoPropAssessStates.INTER_TRIAL_REST
-            or self._smachine.state == PlutoPropAssessStates.PROTOCOL_STOP
-            or self._smachine.state == PlutoPropAssessStates.PROP_DONE
-        )
-        _tgt = (self._data['targets'][self._data['trialno']]
+        _checkstate = not (NO_TARGET_STATES_MASK >> _state) & 1
+        _tgt = (float(self._data['targets'][self._data['trialno']])
                 if _checkstate else 0)
-        # Update target line        
-        self.ui.tgtLine1.setData(
-            [_tgt, _tgt],
-            [-30, 30]
-        )
-        self.ui.tgtLine2.setData(
-            [-_tgt, -_tgt],
-            [-30, 30]
-        )
+        # The target line is redrawn only when the target has changed.
+        self._cursors["target"].set_position(_tgt)
 
         # Update based on state
-        _dispstr = [f"Hand Aperture: {self._pluto.hocdisp:5.2f}cm"]
-        if self._smachine.state == PlutoPropAssessStates.WAIT_FOR_START:
+        _dispstr = [f"Hand Aperture: {_pos:5.2f}cm"]
+        if _state == PlutoPropAssessStates.WAIT_FOR_START:
             self.ui.pbStartStopProtocol.setText("Start Protocol")
             _dispstr = ["", self._smachine.instruction,
-                        "", str(self._smachine.state)]
+                        "", _statetext]
             self.ui.checkBoxPauseProtocol.setEnabled(False)
-        elif self._smachine.state == PlutoPropAssessStates.WAIT_FOR_HAPTIC_DISPAY_START:
+        elif _state == PlutoPropAssessStates.WAIT_FOR_HAPTIC_DISPAY_START:
             self.ui.pbStartStopProtocol.setText("Stop Protocol")
             _trlines = self._get_trial_details_line("Waiting for Haptic Demo")
             _dispstr += _trlines + [self._smachine.instruction,
-                                    "", str(self._smachine.state)]
+                                    "", _statetext]
             self.ui.checkBoxPauseProtocol.setEnabled(False)
-        elif self._smachine.state == PlutoPropAssessStates.TRIAL_HAPTIC_DISPLAY_MOVING:
+        elif _state == PlutoPropAssessStates.TRIAL_HAPTIC_DISPLAY_MOVING:
             _trlines = self._get_trial_details_line("Haptic Demo")
             _dispstr += _trlines + ["Moving to target position.", 
-                                    "", str(self._smachine.state)]
-        elif self._smachine.state == PlutoPropAssessStates.TRIAL_HAPTIC_DISPLAY:
+                                    "", _statetext]
+        elif _state == PlutoPropAssessStates.TRIAL_HAPTIC_DISPLAY:
             _trlines = self._get_trial_details_line("Haptic Demo")
             _dispstr += _trlines + ["Demonstraing Haptic Position.",
-                                    "", str(self._smachine.state)]
-        elif self._smachine.state == PlutoPropAssessStates.INTRA_TRIAL_REST:
+                                    "", _statetext]
+        elif _state == PlutoPropAssessStates.INTRA_TRIAL_REST:
             _trlines = self._get_trial_details_line("Waiting for hand to be closed.")
-            _dispstr += _trlines + ["", str(self._smachine.state)]
-        elif self._smachine.state == PlutoPropAssessStates.TRIAL_ASSESSMENT_MOVING:
+            _dispstr += _trlines + ["", _statetext]
+        elif _state == PlutoPropAssessStates.TRIAL_ASSESSMENT_MOVING:
             _trlines = self._get_trial_details_line("Assessing proprioception.")
-            _dispstr += _trlines + ["", str(self._smachine.state)]
-        elif self._smachine.state == PlutoPropAssessStates.TRIAL_ASSESSMENT_RESPONSE_HOLD:
+            _dispstr += _trlines + ["", _statetext]
+        elif _state == PlutoPropAssessStates.TRIAL_ASSESSMENT_RESPONSE_HOLD:
             _trlines = self._get_trial_details_line("Holding Sensed Position.")
-            _dispstr += _trlines + ["", str(self._smachine.state)]
-        elif self._smachine.state == PlutoPropAssessStates.TRIAL_ASSESSMENT_NO_RESPONSE_HOLD:
+            _dispstr += _trlines + ["", _statetext]
+        elif _state == PlutoPropAssessStates.TRIAL_ASSESSMENT_NO_RESPONSE_HOLD:
             _trlines = self._get_trial_details_line("Holding Max. Position (No Response).")
-            _dispstr += _trlines + ["", str(self._smachine.state)]
-        elif self._smachine.state == PlutoPropAssessStates.INTER_TRIAL_REST:
+            _dispstr += _trlines + ["", _statetext]
+        elif _state == PlutoPropAssessStates.INTER_TRIAL_REST:
             _trlines = self._get_trial_details_line("Waiting for the hand to be closed.")
-            _dispstr += _trlines + ["", str(self._smachine.state)]
-        elif self._smachine.state == PlutoPropAssessStates.PROP_DONE:
+            _dispstr += _trlines + ["", _statetext]
+        elif _state == PlutoPropAssessStates.PROP_DONE:
              _trlines = self._get_trial_details_line(f"All {len(self._data['targets'])} trials completed! You can close the window.")
-             _dispstr += ["", _trlines[1]] + ["", str(self._smachine.state)]
+             _dispstr += ["", _trlines[1]] + ["", _statetext]
              self.ui.pbStartStopProtocol.setEnabled(False)
-        elif self._smachine.state == PlutoPropAssessStates.PROTOCOL_STOP:
+        elif _state == PlutoPropAssessStates.PROTOCOL_STOP:
              _trlines = self._get_trial_details_line(f"Stopping protocol.")
-             _dispstr += _trlines + ["", str(self._smachine.state)]
+             _dispstr += _trlines + ["", _statetext]
              self.ui.pbStartStopProtocol.setEnabled(False)
 
-        # Update text.
-        self.ui.textInformation.setText("\n".join(_dispstr))
+        # Update text only when it has changed.
+        _infotext = "\n".join(_dispstr)
+        if _infotext != self._lastinfotext:
+            self.ui.textInformation.setText(_infotext)
+            self._lastinfotext = _infotext
 
     #
     # Graph plot initialization
@@ -470,103 +546,61 @@ class PlutoPropAssessWindow(QtWidgets.QMainWindow):
     def _propassess_add_graph(self):
         """Function to add graph and other objects for displaying HOC movements.
         """
-        _pgobj = pg.PlotWidget()
-        _templayout = QtWidgets.QGridLayout()
-        _templayout.addWidget(_pgobj)
-        _pen = pg.mkPen(color=(255, 0, 0))
-        self.ui.hocGraph.setLayout(_templayout)
-        _pgobj.setYRange(-20, 20)
-        _pgobj.setXRange(-10, 10)
-        _pgobj.getAxis('bottom').setStyle(showValues=False)
-        _pgobj.getAxis('left').setStyle(showValues=False)
-        
-        # Current position lines
-        self.ui.currPosLine1 = pg.PlotDataItem(
-            [0, 0],
-            [-30, 30],
-            pen=pg.mkPen(color = '#FFFFFF',width=1)
-        )
-        self.ui.currPosLine2 = pg.PlotDataItem(
-            [0, 0],
-            [-30, 30],
-            pen=pg.mkPen(color = '#FFFFFF',width=1)
-        )
-        _pgobj.addItem(self.ui.currPosLine1)
-        _pgobj.addItem(self.ui.currPosLine2)
-        
-        # AROM Lines
-        self.ui.aromLine1 = pg.PlotDataItem(
-            [self._arom, self._arom],
-            [-30, 30],
-            pen=pg.mkPen(color = '#FF8888',width=1, style=QtCore.Qt.DotLine)
-        )
-        self.ui.aromLine2 = pg.PlotDataItem(
-            [-self._arom, -self._arom],
-            [-30, 30],
-            pen=pg.mkPen(color = '#FF8888',width=1, style=QtCore.Qt.DotLine)
-        )
-        _pgobj.addItem(self.ui.aromLine1)
-        _pgobj.addItem(self.ui.aromLine2)
-        
-        # PROM Lines
-        self.ui.promLine1 = pg.PlotDataItem(
-            [self._prom, self._prom],
-            [-30, 30],
-            pen=pg.mkPen(color = '#8888FF',width=1, style=QtCore.Qt.DotLine)
-        )
-        self.ui.promLine2 = pg.PlotDataItem(
-            [-self._prom, -self._prom],
-            [-30, 30],
-            pen=pg.mkPen(color = '#8888FF',width=1, style=QtCore.Qt.DotLine)
-        )
-        _pgobj.addItem(self.ui.promLine1)
-        _pgobj.addItem(self.ui.promLine2)
-        
-        # Target Lines
-        self.ui.tgtLine1 = pg.PlotDataItem(
-            [0, 0],
-            [-30, 30],
-            pen=pg.mkPen(color = '#00FF00',width=2)
-        )
-        self.ui.tgtLine2 = pg.PlotDataItem(
-            [0, 0],
-            [-30, 30],
-            pen=pg.mkPen(color = '#00FF00',width=2)
-        )
-        _pgobj.addItem(self.ui.tgtLine1)
-        _pgobj.addItem(self.ui.tgtLine2)
+        _pgobj = pwu.create_hoc_graph(self.ui.hocGraph)
+        # Current position, AROM, PROM and target cursors.
+        self._cursors = {
+            "currpos": pwu.HocCursor(_pgobj, CURR_POS_PEN),
+            "arom": pwu.HocCursor(_pgobj, AROM_PEN, self._arom),
+            "prom": pwu.HocCursor(_pgobj, PROM_PEN, self._prom),
+            "target": pwu.HocCursor(_pgobj, TARGET_PEN)
+        }
 
     #
     # Signal Callbacks
     # 
     def _callback_pluto_newdata(self):
-        _strans = self._smachine.run_statemachine(
+        _smachine = self._smachine
+        _strans = _smachine.run_statemachine(
             None,
             self._time
         )
+        _p = self._pluto
+        _pos = _p.hocdisp
         # Write data row to the file.
-        if self._data['trialfhandle'] is not None:
+        _fh = self._data['trialfhandle']
+        if _fh is not None:
             try:
                 # time,status,error,mechanism,angle,hocdisp,torque,control,target,button,framerate,state
-                self._data['trialfhandle'].write(",".join((
+                _fh.write(TRIAL_DATA_ROW_FORMAT % (
                     dt.now().strftime("%Y-%m-%d %H:%M:%S.%f"),
-                    f"{self._pluto.status}",
-                    f"{self._pluto.error}",
-                    f"{self._pluto.mechanism}",
-                    f"{self._pluto.angle:0.3f}",
-                    f"{self._pluto.hocdisp:0.3f}",
-                    f"{self._pluto.torque:0.3f}",
-                    f"{self._pluto.control:0.3f}",
-                    f"{self._pluto.target:0.3f}",
-                    f"{self._pluto.button}",
-                    f"{self._pluto.framerate():0.3f}",
-                    f"{self._smachine.state}".split('.')[-1]
-                )))
-                self._data['trialfhandle'].write("\n")
-            except ValueError:
+                    _p.status,
+                    _p.error,
+                    _p.mechanism,
+                    _p.angle,
+                    _pos,
+                    _p.torque,
+                    _p.control,
+                    _p.target,
+                    _p.button,
+                    _p.framerate(),
+                    _smachine.state.name
+                ))
+            except (OSError, ValueError) as e:
+                print(f"Trial data file error: {e}")
                 self._data['trialfhandle'] = None
-        self._state_handlers[self._smachine.state](_strans)
-        self.update_ui()
+        self._run_state_handler(_strans)
+        # Log the shown and sensed positions for the trial summary. The
+        # state handler can change the state, so read it after the handler.
+        _state = _smachine.state
+        if _state == PlutoPropAssessStates.TRIAL_HAPTIC_DISPLAY:
+            _summary = self._summary
+            _summary['shownsum'] += _pos
+            _summary['shownn'] += 1
+        elif _state == PlutoPropAssessStates.TRIAL_ASSESSMENT_RESPONSE_HOLD:
+            _summary = self._summary
+            _summary['sensedsum'] += _pos
+            _summary['sensedn'] += 1
+        self._uidirty = True
 
     def _callback_pluto_btn_released(self):
         # Run the statemachine
@@ -574,7 +608,7 @@ class PlutoPropAssessWindow(QtWidgets.QMainWindow):
             pdef.PlutoEvents.RELEASED,
             self._time
         )
-        self._state_handlers[self._smachine.state](_strans)
+        self._run_state_handler(_strans)
         self.update_ui()
 
     #
@@ -583,9 +617,10 @@ class PlutoPropAssessWindow(QtWidgets.QMainWindow):
     def _callback_propprotocol_startstop(self, event):
         # Check if this is a start or stop event.
         if self._smachine.state == PlutoPropAssessStates.WAIT_FOR_START:
-            # Start start time
+            # Start start time. The assessment and the first trial start
+            # together.
             self._data["assess_strt_t"] = dt.now()
-            self._data["trial_strt_t"] = dt.now()
+            self._data["trial_strt_t"] = self._data["assess_strt_t"]
             
             # Check if there is a valid next target
             if self._are_all_trials_done(): 
@@ -608,7 +643,7 @@ class PlutoPropAssessWindow(QtWidgets.QMainWindow):
                 self._time
             )
         # Handle the current proprioceptuive assessment state
-        self._state_handlers[self._smachine.state](_strans)
+        self._run_state_handler(_strans)
 
         self.update_ui()
     
@@ -660,10 +695,10 @@ class PlutoPropAssessWindow(QtWidgets.QMainWindow):
             _strans = self._check_protocol_stop_timeout()
 
         # Handle the current proprioceptuive assessment state
-        self._state_handlers[self._smachine.state](_strans)
+        self._run_state_handler(_strans)
 
-        # Update UI
-        self.update_ui()
+        # Mark UI for update
+        self._uidirty = True
 
     def _check_target_display_timeout(self) -> bool:
         _tgterr = self._tgtctrl["final"] - self.pluto.hocdisp
@@ -737,23 +772,25 @@ class PlutoPropAssessWindow(QtWidgets.QMainWindow):
         # Check if the target has been maintained for the required duration.
         if self._time >= self._protocol['intert_rest_dur']:
             # Close trial data file.
-            self._data['trialfhandle'].flush()
-            self._data['trialfhandle'].close()
+            self._close_trial_file()
             self._data['trialfile'] = ""
-            self._data['trialfhandle'] = None
 
             # Write summary details.
+            _shown = (self._summary['shownsum'] / self._summary['shownn']
+                      if self._summary['shownn'] > 0 else float("nan"))
+            _sensed = (self._summary['sensedsum'] / self._summary['sensedn']
+                       if self._summary['sensedn'] > 0 else -1)
             with open(self._summary['file'], "a") as fh:
                 fh.write(",".join((
                     f"{self._data['trialno']+1}",
                     f"{self._data['targets'][self._data['trialno']]}",
-                    f"{np.mean(self._summary['shownpos']):0.3f}",
-                    f"{np.mean(self._summary['sensedpos']) if len(self._summary['sensedpos']) >0 else -1:0.3f}",
+                    f"{_shown:0.3f}",
+                    f"{_sensed:0.3f}",
                 )))
                 fh.write("\n")
             # Reset summary position data
-            self._summary['shownpos'] = []
-            self._summary['sensedpos'] = []
+            self._reset_summary_shownpos()
+            self._reset_summary_sensedpos()
 
             # Check if there is a valid next target
             if self._are_all_trials_done(): 
@@ -782,11 +819,8 @@ class PlutoPropAssessWindow(QtWidgets.QMainWindow):
         # Check if the target has been maintained for the required duration.
         if self._time >= self._protocol['intert_rest_dur']:
             # Close trial data file.
-            if self._data['trialfhandle'] is not None:
-                self._data['trialfhandle'].flush()
-                self._data['trialfhandle'].close()
-                self._data['trialfile'] = ""
-                self._data['trialfhandle'] = None
+            self._close_trial_file()
+            self._data['trialfile'] = ""
 
             # Go to the next trial.
             # All done.
@@ -811,16 +845,20 @@ class PlutoPropAssessWindow(QtWidgets.QMainWindow):
             'trialno': -1,
             'trialfile': "",
             'trialfhandle': None,
+            'trialwriters': [],
         }
         
         # Set sutiable targets.
         self._generate_propassess_targets()
 
-        # Assessment summary
+        # Assessment summary. The running sum and number of the shown and
+        # sensed positions give their means at the end of the trial.
         self._summary = {
             'file': f"{self.outdir}/propass_summary.csv",
-            'shownpos': [],
-            'sensedpos': []
+            'shownsum': 0.0,
+            'shownn': 0,
+            'sensedsum': 0.0,
+            'sensedn': 0
         }
         # Create the summary file.
         with open(self._summary['file'], "w") as fh:
@@ -858,6 +896,14 @@ class PlutoPropAssessWindow(QtWidgets.QMainWindow):
             _tstrs.append(f"On Target Dur: {self._time:4.1f}sec")
         return [" | ".join(_tstrs), " | ".join(_strs)]
 
+    def _reset_summary_shownpos(self):
+        self._summary['shownsum'] = 0.0
+        self._summary['shownn'] = 0
+
+    def _reset_summary_sensedpos(self):
+        self._summary['sensedsum'] = 0.0
+        self._summary['sensedn'] = 0
+
     def _are_all_trials_done(self):
         return self._data['trialno'] + 1 == len(self._data['targets'])
 
@@ -873,24 +919,22 @@ class PlutoPropAssessWindow(QtWidgets.QMainWindow):
             return False
     
     def _update_target_position(self):
-        _t, _init, _tgt, _dur = (self._tgtctrl["time"],
-                                 self._tgtctrl["init"],
-                                 self._tgtctrl["final"],
-                                 self._tgtctrl["dur"])
+        _tgtctrl = self._tgtctrl
         # Limit time to be between 0 and 1.
-        self._tgtctrl["curr"] = _init + (_tgt - _init) * clip(_t / _dur)
+        _curr = (_tgtctrl["init"]
+                 + _tgtctrl["span"] * clip(_tgtctrl["time"] * _tgtctrl["rate"]))
+        _tgtctrl["curr"] = _curr
         # Send command to the robot.
-        self.pluto.set_control_target(-self._tgtctrl["curr"] / pdef.HOCScale)
+        self.pluto.set_control_target(_curr * HOCDISP_TO_ANGLE)
     
     def _update_target_position_mjt(self):
-        _t, _init, _tgt, _dur = (self._tgtctrl["time"],
-                                 self._tgtctrl["init"],
-                                 self._tgtctrl["final"],
-                                 self._tgtctrl["dur"])
+        _tgtctrl = self._tgtctrl
         # Limit time to be between 0 and 1.
-        self._tgtctrl["curr"] = _init + (_tgt - _init) * mjt(clip(_t / _dur))
+        _curr = (_tgtctrl["init"]
+                 + _tgtctrl["span"] * mjt(clip(_tgtctrl["time"] * _tgtctrl["rate"])))
+        _tgtctrl["curr"] = _curr
         # Send command to the robot.
-        self.pluto.set_control_target(-self._tgtctrl["curr"] / pdef.HOCScale)
+        self.pluto.set_control_target(_curr * HOCDISP_TO_ANGLE)
 
     
     def _set_position_torque_target_information(self, initpos, finalpos):
@@ -902,12 +946,16 @@ class PlutoPropAssessWindow(QtWidgets.QMainWindow):
         # Duration/Speed
         self._tgtctrl["dur"] = abs(self._tgtctrl["final"] - self._tgtctrl["init"]) / self._protocol['move_speed']
         self._tgtctrl["dur"] = self._tgtctrl["dur"] if self._tgtctrl["dur"] != 0 else 1.0
+        # Constants of the target profile for this move.
+        self._tgtctrl["span"] = finalpos - initpos
+        self._tgtctrl["rate"] = 1.0 / self._tgtctrl["dur"]
         self._ctrl_timer.start(int(passdef.PROPASS_CTRL_TIMER_DELTA * 1000))
         # Initialize the propass state machine time
         self._time = -1
 
     def _create_trial_file(self):
-        self._data['trialfhandle'] = open(self._data["trialfile"], "w")
+        self._data['trialfhandle'] = PlutoTrialDataWriter(self._data["trialfile"])
+        self._data['trialwriters'].append(self._data['trialfhandle'])
             # Write the header and trial details
         self._data['trialfhandle'].writelines([
                 f"subject type: {self._subjtype}\n",
@@ -920,8 +968,33 @@ class PlutoPropAssessWindow(QtWidgets.QMainWindow):
                 f"start time: {self._data['trial_strt_t'].strftime('%Y-%m-%d %H:%M:%S.%f')}\n",
                 "time,status,error,mechanism,angle,hocdisp,torque,control,target,button,framerate,state\n"
             ])
-        self._data['trialfhandle'].flush()
+        self._flush_trial_file()
+
+    def _flush_trial_file(self):
+        if self._data['trialfhandle'] is None:
+            return
+        try:
+            self._data['trialfhandle'].flush()
+        except (OSError, ValueError) as e:
+            print(f"Trial data file error: {e}")
+            self._data['trialfhandle'] = None
+
+    def _close_trial_file(self):
+        if self._data['trialfhandle'] is None:
+            return
+        try:
+            self._data['trialfhandle'].close()
+        except (OSError, ValueError) as e:
+            print(f"Trial data file error: {e}")
+        self._data['trialfhandle'] = None
     
+    def _run_state_handler(self, statetrans):
+        # Pass the trial data of the previous state to the writer thread on a
+        # state transition, so the file keeps up with the protocol.
+        if statetrans and self._data['trialfhandle'] is not None:
+            self._data['trialfhandle'].push()
+        self._state_handlers[self._smachine.state](statetrans)
+
     #
     # Device Data Viewer Functions 
     #
@@ -950,32 +1023,29 @@ class PlutoPropAssessWindow(QtWidgets.QMainWindow):
             # Create and open next trial file for data logging.
             self._create_trial_file()
 
-            # Set target information.
+            # Set target information. The target is taken as a Python float,
+            # so that the control loop does not work on numpy scalars.
             self._set_position_torque_target_information(
                 initpos=self._pluto.hocdisp,
-                finalpos=self._data['targets'][self._data['trialno']]
+                finalpos=float(self._data['targets'][self._data['trialno']])
             )
 
             # Set control type and target
-            self._pluto.set_control_type("POSITION")
-            self._pluto.set_control_target(self._pluto.angle)
+            self._pluto.set_control_type_target("POSITION", self._pluto.angle)
 
     def _handle_trial_haptic_display(self, statetrans):
         # Initialize the statemachine timer if needed.
         if statetrans:
             self._time = 0.
             # Reset the shown position
-            self._summary['shownpos'] = []
-        # Log data only if the function is called from the new data callback.
-        if inspect.stack()[1].function == '_callback_pluto_newdata':
-            self._summary['shownpos'].append(self._pluto.hocdisp)
+            self._reset_summary_shownpos()
     
     def _handle_intra_trial_rest(self, statetrans):
         # Check if there has been a state transitions. This indicates that we
         # to move the hand back to the closed position.
         if statetrans:
             # Flush data to disk
-            self._data['trialfhandle'].flush()
+            self._flush_trial_file()
 
             # Set target information.
             self._set_position_torque_target_information(
@@ -985,44 +1055,55 @@ class PlutoPropAssessWindow(QtWidgets.QMainWindow):
     
     def _handle_trial_assessment_moving(self, statetrans):
         if statetrans:
-            # Beep Beep
-            winsound.Beep(BEEP_FREQ, BEEP_DUR)
-
-            # Set target information.
-            self._set_position_torque_target_information(
-                initpos=self._pluto.hocdisp,
-                finalpos=self.prom
-            )
+            # Beep Beep. winsound.Beep blocks till the beep is done, so it is
+            # played from another thread to keep the GUI thread running. The
+            # movement starts after the beep.
+            self._ctrl_timer.stop()
+            threading.Thread(
+                target=winsound.Beep,
+                args=(BEEP_FREQ, BEEP_DUR),
+                daemon=True
+            ).start()
+            self._beep_timer.start(BEEP_DUR)
+
+    def _start_trial_assessment_move(self):
+        # Nothing to do if the state has changed during the beep.
+        if self._smachine.state != PlutoPropAssessStates.TRIAL_ASSESSMENT_MOVING:
+            return
+        # Set target information.
+        self._set_position_torque_target_information(
+            initpos=self._pluto.hocdisp,
+            finalpos=self.prom
+        )
     
     def _handle_trial_assessment_response_hold(self, statetrans):
         if statetrans:
             # Set target information.
+            _pos = self._pluto.hocdisp
             self._set_position_torque_target_information(
-                initpos=self._pluto.hocdisp,
-                finalpos=self._pluto.hocdisp
+                initpos=_pos,
+                finalpos=_pos
             )
             self._time = 0
             # Reset sensed position information in the summary data
-            self._summary['sensedpos'] = []
-        # Log data only if the function is called from the new data callback.
-        if inspect.stack()[1].function == '_callback_pluto_newdata':
-            self._summary['sensedpos'].append(self._pluto.hocdisp)
+            self._reset_summary_sensedpos()
     
     def _handle_trial_assessment_no_response_hold(self, statetrans):
         if statetrans:
             # Set target information.
+            _pos = self._pluto.hocdisp
             self._set_position_torque_target_information(
-                initpos=self._pluto.hocdisp,
-                finalpos=self._pluto.hocdisp
+                initpos=_pos,
+                finalpos=_pos
             )
             self._time = 0
-            # Reset position information in the summary data
-            self._summary['pos'] = []
+            # Reset sensed position information in the summary data
+            self._reset_summary_sensedpos()
     
     def _handle_inter_trial_rest(self, statetrans):
         if statetrans:
             # Flush data to disk
-            self._data['trialfhandle'].flush()
+            self._flush_trial_file()
 
             # Set target information.
             self._set_position_torque_target_information(
@@ -1036,10 +1117,7 @@ class PlutoPropAssessWindow(QtWidgets.QMainWindow):
     def _handle_protocol_stop(self, statetrans):
         if statetrans:
             # Flush data to disk
-            try:
-                self._data['trialfhandle'].flush()
-            except AttributeError:
-                pass
+            self._flush_trial_file()
 
             # Set target information.
             self._set_position_torque_target_information(
@@ -1048,8 +1126,9 @@ class PlutoPropAssessWindow(QtWidgets.QMainWindow):
             )
     
     def _handle_protocol_done(self, statetrans):
-        # Stop control.
-        self._pluto.set_control_type("NONE")
+        # Stop control, if the device is not already in no control.
+        if self._pluto.controltype != pdef.ControlType["NONE"]:
+            self._pluto.set_control_type("NONE")
         self._ctrl_timer.stop()
 
 
@@ -21,9 +21,19 @@ import pyqtgraph as pg
 from enum import Enum
 
 import plutodefs as pdef
+import plutowindowutils as pwu
 from ui_plutoromassess import Ui_RomAssessWindow
 
 
+# Module level constants
+UI_UPDATE_INTERVAL = 40  # UI refresh timer interval (ms)
+
+# Pens for the cursor lines, shared by all ROM assessment windows.
+CURR_POS_PEN = pg.mkPen(color = '#FFFFFF',width=2)
+AROM_PEN = pg.mkPen(color = '#FF8888',width=2)
+PROM_PEN = pg.mkPen(color = '#8888FF',width=2)
+
+
 class PlutoRomAssessEvent(Enum):
     AROM_SELECTED = 0
     PROM_SELECTED = 1
@@ -37,6 +47,9 @@ class PlutoRomAssessStates(Enum):
 
 
 class PlutoRomAssessmentStateMachine():
+    __slots__ = ("_state", "_arom", "_prom", "_instruction", "_apromflag",
+                 "_pluto", "_stateactions", "_stateaction")
+
     def __init__(self, plutodev, aromval=-1, promval=-1):
         self._state = PlutoRomAssessStates.FREE_RUNNING
         self._arom = aromval if aromval >= 0 else 0
@@ -52,6 +65,10 @@ class PlutoRomAssessmentStateMachine():
             PlutoRomAssessStates.PROM_ASSESS: self._prom_assess,
             PlutoRomAssessStates.ROM_DONE: self._rom_done
         }
+        # Action for the current state. This is updated only on state
+        # transitions, so that the state action need not be looked up for
+        # every event.
+        self._stateaction = self._stateactions[self._state]
 
     @property
     def state(self):
@@ -72,16 +89,20 @@ class PlutoRomAssessmentStateMachine():
     def run_statemachine(self, event):
         """Execute the state machine depending on the given even that has occured.
         """
-        return self._stateactions[self._state](event)
+        return self._stateaction(event)
+
+    def _set_state(self, state):
+        self._state = state
+        self._stateaction = self._stateactions[state]
     
     def _free_running(self, event):
         # Wait for AROM or PROM to be selected.
         if event == PlutoRomAssessEvent.AROM_SELECTED:
-            self._state = PlutoRomAssessStates.AROM_ASSESS
+            self._set_state(PlutoRomAssessStates.AROM_ASSESS)
             self._instruction = "Assessing AROM. Press the PLUTO Button when done."
             self._apromflag |= 0x01
         elif event == PlutoRomAssessEvent.PROM_SELECTED:
-            self._state = PlutoRomAssessStates.PROM_ASSESS
+            self._set_state(PlutoRomAssessStates.PROM_ASSESS)
             # print(self._state)
             self._instruction = "Assessing PROM. Press the PLUTO Button when done."
             self._apromflag |= 0x02
@@ -89,27 +110,28 @@ class PlutoRomAssessmentStateMachine():
         if self._apromflag == 0x03:
             self._instruction = "ROM Assessment Done. Press the PLUTO Button to exit."
             if event == pdef.PlutoEvents.RELEASED:
-                self._state = PlutoRomAssessStates.ROM_DONE
+                self._set_state(PlutoRomAssessStates.ROM_DONE)
     
     def _arom_assess(self, event):
         # Check if the button release event has happened.
         if event == pdef.PlutoEvents.RELEASED:
-            self._arom = abs(self._pluto.hocdisp)
+            self._arom = self._pluto.hocdisp
             # Update PROM if needed
             self._prom = self._arom if self._arom > self._prom else self._prom
             # Update the instruction
             self._instruction = "Select AROM or PROM to assess."
-            self._state = PlutoRomAssessStates.FREE_RUNNING
+            self._set_state(PlutoRomAssessStates.FREE_RUNNING)
             return "aromset"
  
     def _prom_assess(self, event):
         # Check if the button release event has happened.
         if event == pdef.PlutoEvents.RELEASED:
-            if abs(self._pluto.hocdisp) >= self._arom:
-                self._prom = abs(self._pluto.hocdisp)
+            _pos = self._pluto.hocdisp
+            if _pos >= self._arom:
+                self._prom = _pos
                 # Update the instruction
                 self._instruction = "Select AROM or PROM to assess."
-                self._state = PlutoRomAssessStates.FREE_RUNNING
+                self._set_state(PlutoRomAssessStates.FREE_RUNNING)
                 return "promset"
             else:
                 # Update the instruction
@@ -121,7 +143,7 @@ class PlutoRomAssessmentStateMachine():
 
 
 
-class PlutoRomAssessWindow(QtWidgets.QMainWindow):
+class PlutoRomAssessWindow(pwu.TimedUIUpdate, QtWidgets.QMainWindow):
     """
     Class for handling the operation of the PLUTO ROM assessment window.
     """
@@ -151,6 +173,9 @@ class PlutoRomAssessWindow(QtWidgets.QMainWindow):
         # Initialize graph for plotting
         self._romassess_add_graph()
 
+        # Last displayed state of the UI.
+        self._ui_cache = None
+
         # Attach callbacks
         self.pluto.newdata.connect(self._callback_pluto_newdata)
         self.pluto.btnreleased.connect(self._callback_pluto_btn_released)
@@ -162,6 +187,9 @@ class PlutoRomAssessWindow(QtWidgets.QMainWindow):
         # Update UI.
         self.update_ui()
 
+        # UI refresh timer.
+        self._init_ui_timer(UI_UPDATE_INTERVAL)
+
     @property
     def pluto(self):
         return self._pluto
@@ -186,47 +214,32 @@ class PlutoRomAssessWindow(QtWidgets.QMainWindow):
     # Update UI
     #
     def update_ui(self):
+        # Nothing to draw when the window is hidden or minimized.
+        if not self.isVisible() or self.isMinimized():
+            return
+        # Read the hand position and state once for this update.
+        _pos = self.pluto.hocdisp
+        if _pos is None:
+            return
+        _state = self._smachine.state
+        # Nothing to update if none of the displayed values have changed
+        # since the last update (hand position to the displayed 0.01cm).
+        _smstate = (_state, self.arom, self.prom, self._smachine.instruction)
+        _uistate = (_smstate, round(_pos, 2))
+        if _uistate == self._ui_cache:
+            return
+        _smchanged = (self._ui_cache is None or _smstate != self._ui_cache[0])
+        self._ui_cache = _uistate
+
         # Update the graph display
-        # Current position
-        if self._smachine.state == PlutoRomAssessStates.FREE_RUNNING:
-            if self.pluto.hocdisp is None:
-                return
-            # Plot when there is data to be shown
-            self.ui.currPosLine1.setData(
-                [self.pluto.hocdisp, self.pluto.hocdisp],
-                [-30, 30]
-            )
-            self.ui.currPosLine2.setData(
-                [-self.pluto.hocdisp, -self.pluto.hocdisp],
-                [-30, 30]
-            )
-        elif self._smachine.state == PlutoRomAssessStates.AROM_ASSESS:
-            self.ui.currPosLine1.setData([0, 0], [-30, 30])
-            self.ui.currPosLine2.setData([0, 0], [-30, 30])
-            # AROM position
-            self.ui.aromLine1.setData(
-                [self.pluto.hocdisp, self.pluto.hocdisp],
-                [-30, 30]
-            )
-            self.ui.aromLine2.setData(
-                [-self.pluto.hocdisp, -self.pluto.hocdisp],
-                [-30, 30]
-            )
-        elif self._smachine.state == PlutoRomAssessStates.PROM_ASSESS:
-            self.ui.currPosLine1.setData([0, 0], [-30, 30])
-            self.ui.currPosLine2.setData([0, 0], [-30, 30])
-            # PROM position
-            self.ui.promLine1.setData(
-                [self.pluto.hocdisp, self.pluto.hocdisp],
-                [-30, 30]
-            )
-            self.ui.promLine2.setData(
-                [-self.pluto.hocdisp, -self.pluto.hocdisp],
-                [-30, 30]
-            )
+        self._update_cursor_lines(_state, _pos)
 
         # Update main text
-        self.ui.label.setText(f"PLUTO ROM Assessment [{self.pluto.hocdisp:5.2f}cm]")
+        self.ui.label.setText(f"PLUTO ROM Assessment [{_pos:5.2f}cm]")
+
+        # The instruction and buttons only change with the state machine.
+        if not _smchanged:
+            return
 
         # Update instruction
         self.ui.textInstruction.setText(self._smachine.instruction)
@@ -235,15 +248,25 @@ class PlutoRomAssessWindow(QtWidgets.QMainWindow):
         self.ui.pbArom.setText(f"Assess AROM [{self.arom:5.2f}cm]")
         self.ui.pbProm.setText(f"Assess PROM [{self.prom:5.2f}cm]")
         self.ui.pbArom.setEnabled(
-            self._smachine.state == PlutoRomAssessStates.FREE_RUNNING
+            _state == PlutoRomAssessStates.FREE_RUNNING
         )
         self.ui.pbProm.setEnabled(
-            self._smachine.state == PlutoRomAssessStates.FREE_RUNNING
+            _state == PlutoRomAssessStates.FREE_RUNNING
         )
 
-        # Close if needed
-        if self._smachine.state == PlutoRomAssessStates.ROM_DONE:
-            self.close()   
+    def _update_cursor_lines(self, state, pos):
+        # Current position
+        if state == PlutoRomAssessStates.FREE_RUNNING:
+            # Plot when there is data to be shown
+            self._cursors["currpos"].set_position(pos)
+        elif state == PlutoRomAssessStates.AROM_ASSESS:
+            self._cursors["currpos"].set_position(0)
+            # AROM position
+            self._cursors["arom"].set_position(pos)
+        elif state == PlutoRomAssessStates.PROM_ASSESS:
+            self._cursors["currpos"].set_position(0)
+            # PROM position
+            self._cursors["prom"].set_position(pos)
 
     #
     # Graph plot initialization
@@ -251,70 +274,40 @@ class PlutoRomAssessWindow(QtWidgets.QMainWindow):
     def _romassess_add_graph(self):
         """Function to add graph and other objects for displaying HOC movements.
         """
-        _pgobj = pg.PlotWidget()
-        _templayout = QtWidgets.QGridLayout()
-        _templayout.addWidget(_pgobj)
-        _pen = pg.mkPen(color=(255, 0, 0))
-        self.ui.hocGraph.setLayout(_templayout)
-        _pgobj.setYRange(-20, 20)
-        _pgobj.setXRange(-10, 10)
-        _pgobj.getAxis('bottom').setStyle(showValues=False)
-        _pgobj.getAxis('left').setStyle(showValues=False)
-        
-        # Current position lines
-        self.ui.currPosLine1 = pg.PlotDataItem(
-            [0, 0],
-            [-30, 30],
-            pen=pg.mkPen(color = '#FFFFFF',width=2)
-        )
-        self.ui.currPosLine2 = pg.PlotDataItem(
-            [0, 0],
-            [-30, 30],
-            pen=pg.mkPen(color = '#FFFFFF',width=2)
-        )
-        _pgobj.addItem(self.ui.currPosLine1)
-        _pgobj.addItem(self.ui.currPosLine2)
-        
-        # AROM Lines
-        self.ui.aromLine1 = pg.PlotDataItem(
-            [0, 0],
-            [-30, 30],
-            pen=pg.mkPen(color = '#FF8888',width=2)
-        )
-        self.ui.aromLine2 = pg.PlotDataItem(
-            [0, 0],
-            [-30, 30],
-            pen=pg.mkPen(color = '#FF8888',width=2)
-        )
-        _pgobj.addItem(self.ui.aromLine1)
-        _pgobj.addItem(self.ui.aromLine2)
-        
-        # PROM Lines
-        self.ui.promLine1 = pg.PlotDataItem(
-            [0, 0],
-            [-30, 30],
-            pen=pg.mkPen(color = '#8888FF',width=2)
-        )
-        self.ui.promLine2 = pg.PlotDataItem(
-            [0, 0],
-            [-30, 30],
-            pen=pg.mkPen(color = '#8888FF',width=2)
-        )
-        _pgobj.addItem(self.ui.promLine1)
-        _pgobj.addItem(self.ui.promLine2)
+        _pgobj = pwu.create_hoc_graph(self.ui.hocGraph)
+        # Current position, AROM and PROM cursors.
+        self._cursors = {
+            "currpos": pwu.HocCursor(_pgobj, CURR_POS_PEN),
+            "arom": pwu.HocCursor(_pgobj, AROM_PEN),
+            "prom": pwu.HocCursor(_pgobj, PROM_PEN)
+        }
+
+    #
+    # Supporting functions
+    #
+    def _run_statemachine(self, event):
+        _wasdone = self._smachine.state == PlutoRomAssessStates.ROM_DONE
+        _ret = self._smachine.run_statemachine(event)
+        # Close when the assessment is done, even if the window is hidden
+        # or minimized.
+        if (not _wasdone
+            and self._smachine.state == PlutoRomAssessStates.ROM_DONE):
+            self.close()
+        return _ret
 
     #
     # Signal Callbacks
     # 
     def _callback_pluto_newdata(self):
-        self._smachine.run_statemachine(
+        self._run_statemachine(
             pdef.PlutoEvents.NEWDATA
         )
-        self.update_ui()
+        # Mark UI for update
+        self._uidirty = True
 
     def _callback_pluto_btn_released(self):
         # Run the statemachine
-        apromset = self._smachine.run_statemachine(
+        apromset = self._run_statemachine(
             pdef.PlutoEvents.RELEASED
         )
         self.update_ui()
@@ -328,13 +321,13 @@ class PlutoRomAssessWindow(QtWidgets.QMainWindow):
     # Control Callbacks
     #
     def _callback_arom_clicked(self, event):
-        self._smachine.run_statemachine(
+        self._run_statemachine(
             PlutoRomAssessEvent.AROM_SELECTED
         )
         self.update_ui()
     
     def _callback_prom_clicked(self, event):
-        self._smachine.run_statemachine(
+        self._run_statemachine(
             PlutoRomAssessEvent.PROM_SELECTED
         )
         self.update_ui()
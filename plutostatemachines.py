@@ -12,6 +12,11 @@ from enum import Enum
 import plutodefs as pdef
 
 
+# Calibration status codes checked by the calibration state machine.
+YESCALIB = pdef.CalibrationStatus["YESCALIB"]
+NOCALIB = pdef.CalibrationStatus["NOCALIB"]
+
+
 class PlutoButtonEvents(Enum):
     PRESSED = 0
     RELEASED = 1
@@ -58,24 +63,24 @@ class PlutoCalibrationStateMachine():
     
     def _zero_set(self, event, mech):
         # Check if the button release event has happened.
-        if event == PlutoButtonEvents.RELEASED:
+        if event is PlutoButtonEvents.RELEASED:
             # Send the calibration command to the device.
             self._pluto.calibrate(mech)
             return
         # Check of the calibration is done.
-        if self._pluto.calibration == pdef.get_code(pdef.CalibrationStatus, "YESCALIB"):
+        if self._pluto.calibration == YESCALIB:
             self._state = PlutoCalibStates.WAIT_FOR_ROM_SET
     
     def _rom_set(self, event, mech):
         # Check of the calibration is done.
-        if self._pluto.calibration == pdef.get_code(pdef.CalibrationStatus, "NOCALIB"):
+        if self._pluto.calibration == NOCALIB:
             self._state = PlutoCalibStates.WAIT_FOR_ZERO_SET
             return
         # Check if the button release event has happened.
-        if event == PlutoButtonEvents.RELEASED:
+        if event is PlutoButtonEvents.RELEASED:
             # Check if the ROM is acceptable.
-            _romcheck = (-self._pluto.angle >= 0.9 * pdef.PlutoAngleRanges[mech]
-                         and -self._pluto.angle <= 1.1 * pdef.PlutoAngleRanges[mech])
+            _minrom, _maxrom = pdef.PlutoCalibROMLimits[mech]
+            _romcheck = _minrom <= -self._pluto.angle <= _maxrom
             if _romcheck:
                 # Everything looks good. Calibration is complete.
                 self._state = PlutoCalibStates.WAIT_FOR_CLOSE
@@ -85,13 +90,15 @@ class PlutoCalibrationStateMachine():
     
     def _close(self, event, mech):
         # Check if the button release event has happened.
-        if event == PlutoButtonEvents.RELEASED:
+        if event is PlutoButtonEvents.RELEASED:
             # Calibration all done.
             self._state = PlutoCalibStates.CALIB_DONE
     
     def _calib_error(self, event, mech):
-        self._pluto.calibrate("NOMECH")
-        if event == PlutoButtonEvents.RELEASED:
+        # Reset the calibration till the device confirms it.
+        if self._pluto.calibration != NOCALIB:
+            self._pluto.calibrate("NOMECH")
+        if event is PlutoButtonEvents.RELEASED:
             # Calibration all done.
             self._state = PlutoCalibStates.CALIB_DONE
 
@@ -165,7 +172,7 @@ class PlutoRomAssessmentStateMachine():
     def _arom_assess(self, event):
         # Check if the button release event has happened.
         if event == PlutoButtonEvents.RELEASED:
-            self._arom = abs(self._pluto.hocdisp)
+            self._arom = self._pluto.hocdisp
             # Update PROM if needed
             self._prom = self._arom if self._arom > self._prom else self._prom
             # Update the instruction
@@ -175,8 +182,9 @@ class PlutoRomAssessmentStateMachine():
     def _prom_assess(self, event):
         # Check if the button release event has happened.
         if event == PlutoButtonEvents.RELEASED:
-            if abs(self._pluto.hocdisp) >= self._arom:
-                self._prom = abs(self._pluto.hocdisp)
+            _pos = self._pluto.hocdisp
+            if _pos >= self._arom:
+                self._prom = _pos
                 # Update the instruction
                 self._instruction = "Select AROM or PROM to assess."
                 self._state = PlutoRomAssessStates.FREE_RUNNING
@@ -8,7 +8,6 @@ Email: siva82kb@gmail.com
 
 
 import sys
-import numpy as np
 
 from qtpluto import QtPluto
     
@@ -25,6 +24,20 @@ class PlutoTestControlWindow(QtWidgets.QMainWindow):
     """
     Class for handling the operation of the PLUTO test control window.
     """
+    # Label texts
+    _LBL_FFTORQUE_DEFAULT = "Feedforward Torque Value (Nm):"
+    _LBL_POSTGT_DEFAULT = "Target Position Value (deg):"
+    _LBL_FFTORQUE_FORMAT = (
+        "Feedforward Torque Value (Nm) "
+        f"[{pdef.PlutoTargetRanges['TORQUE'][0]:3.0f}, {pdef.PlutoTargetRanges['TORQUE'][1]:3.0f}]:"
+        " %-3.1fNm"
+    )
+    _LBL_POSTGT_FORMAT = (
+        "Target Position Value (deg):"
+        f"[{pdef.PlutoTargetRanges['POSITION'][0]:3.0f}, {pdef.PlutoTargetRanges['POSITION'][1]:3.0f}]:"
+        " %-3.1fdeg"
+    )
+
     def __init__(self, parent=None, plutodev: QtPluto=None, modal=False, 
                  dataviewer=False):
         """
@@ -39,14 +52,33 @@ class PlutoTestControlWindow(QtWidgets.QMainWindow):
         # PLUTO device
         self._pluto = plutodev
 
-        # Attach callbacks
-        self.pluto.newdata.connect(self._callback_pluto_newdata)
+        # Selected control mode, and the UI update for each mode.
+        self._mode = "NONE"
+        self._mode_handlers = {
+            "NONE": self._update_ui_nocontrol,
+            "POSITION": self._update_ui_control,
+            "TORQUE": self._update_ui_control
+        }
+
+        # Slider position to target value maps, and their inverses. The
+        # slider and target value ranges do not change after setup.
+        self._torqmap, self._torqinvmap = self._get_linear_maps(
+            *self.get_torque_slider_value_ranges()
+        )
+        self._posmap, self._posinvmap = self._get_linear_maps(
+            *self.get_position_slider_value_ranges()
+        )
+
+        # Control type selected by each radio button.
+        self._radio_to_ctrl = {
+            self.ui.radioNone: "NONE",
+            self.ui.radioPosition: "POSITION",
+            self.ui.radioTorque: "TORQUE"
+        }
 
         # Attach controls callback
-        self.ui.radioNone.clicked.connect(self._callback_test_device_control_selected)
-        self.ui.radioPosition.clicked.connect(self._callback_test_device_control_selected)
-        self.ui.radioTorque.clicked.connect(self._callback_test_device_control_selected)
-        self.ui.radioTorque.clicked.connect(self._callback_test_device_control_selected)
+        for _radio in self._radio_to_ctrl:
+            _radio.clicked.connect(self._callback_test_device_control_selected)
         self.ui.hSliderTorqTgtValue.valueChanged.connect(self._callback_test_torque_target_changed)
         self.ui.hSliderPosTgtValue.valueChanged.connect(self._callback_test_position_target_changed)
 
@@ -67,9 +99,6 @@ class PlutoTestControlWindow(QtWidgets.QMainWindow):
         # Close the data viewer window if it is open.
         if hasattr(self, "_devdatawnd"):
             self._devdatawnd.close()
-        
-        # Detach the signal callbacks
-        self.pluto.newdata.disconnect(self._callback_pluto_newdata)
 
         # You can accept or ignore the close event here
         event.accept()  # Accept the event and close the window
@@ -78,32 +107,26 @@ class PlutoTestControlWindow(QtWidgets.QMainWindow):
     # Update UI
     #
     def update_ui(self):
-        _nocontrol = not (self.ui.radioTorque.isChecked()
-                          or self.ui.radioPosition.isChecked())
         # Enable/disable sliders
-        self.ui.hSliderPosTgtValue.setEnabled(self.ui.radioPosition.isChecked())
-        self.ui.hSliderTorqTgtValue.setEnabled(self.ui.radioTorque.isChecked())
+        self.ui.hSliderPosTgtValue.setEnabled(self._mode == "POSITION")
+        self.ui.hSliderTorqTgtValue.setEnabled(self._mode == "TORQUE")
         
-        # Check the status of the radio buttons.
-        if _nocontrol:
-            self.ui.lblFeedforwardTorqueValue.setText("Feedforward Torque Value (Nm):")
-            self.ui.lblPositionTargetValue.setText("Target Position Value (deg):")
-        else:
-            # Desired torque
-            _str = "Feedforward Torque Value (Nm) "
-            _str += f"[{pdef.PlutoTargetRanges['TORQUE'][0]:3.0f}, {pdef.PlutoTargetRanges['TORQUE'][1]:3.0f}]:"
-            slrrange, valrange = self.get_torque_slider_value_ranges()
-            _val = self._pos2tgt(slrrange, valrange, self.ui.hSliderTorqTgtValue.value())
-            _str += f" {_val:-3.1f}Nm"
-            self.ui.lblFeedforwardTorqueValue.setText(_str)
-            # Desired position
-            # Set the text based on the control selected.
-            _str = "Target Position Value (deg):"
-            _str += f"[{pdef.PlutoTargetRanges['POSITION'][0]:3.0f}, {pdef.PlutoTargetRanges['POSITION'][1]:3.0f}]:"
-            slrrange, valrange = self.get_position_slider_value_ranges()
-            _val = self._pos2tgt(slrrange, valrange, self.ui.hSliderPosTgtValue.value())
-            _str += f" {_val:-3.1f}deg"
-            self.ui.lblPositionTargetValue.setText(_str)
+        # Update the labels for the selected control.
+        self._mode_handlers[self._mode]()
+
+    def _update_ui_nocontrol(self):
+        self.ui.lblFeedforwardTorqueValue.setText(self._LBL_FFTORQUE_DEFAULT)
+        self.ui.lblPositionTargetValue.setText(self._LBL_POSTGT_DEFAULT)
+
+    def _update_ui_control(self):
+        # Desired torque
+        self.ui.lblFeedforwardTorqueValue.setText(
+            self._LBL_FFTORQUE_FORMAT % self._get_torque_slider_value()
+        )
+        # Desired position
+        self.ui.lblPositionTargetValue.setText(
+            self._LBL_POSTGT_FORMAT % self._get_position_slider_value()
+        )
     
     #
     # Device Data Viewer Functions 
@@ -114,39 +137,39 @@ class PlutoTestControlWindow(QtWidgets.QMainWindow):
                                                pos=(50, 300))
         self._devdatawnd.show()
 
-    #
-    # Signal Callbacks
-    # 
-    def _callback_pluto_newdata(self):
-        pass
-
     #
     # Control Callbacks
     #
     def _callback_test_device_control_selected(self, event):
-        # Reset the torque & position slider values
-        self._set_torque_slider_value(0)
-        self._set_position_slider_value(self.pluto.angle)
         # Check what has been selected.
-        if self.ui.radioNone.isChecked():
-            self.pluto.set_control_type("NONE")
-        elif self.ui.radioTorque.isChecked():
-            self.pluto.set_control_type("TORQUE")
-        elif self.ui.radioPosition.isChecked():
-            self.pluto.set_control_type("POSITION")
+        _ctrl = self._radio_to_ctrl.get(self.sender())
+        if _ctrl is None:
+            return
+        self._mode = _ctrl
+        # Reset the torque & position slider values. The slider signals are
+        # blocked during the reset, so that their target callbacks do not
+        # send a target and update the UI for each slider. The target for
+        # the selected control is then sent once.
+        with QtCore.QSignalBlocker(self.ui.hSliderTorqTgtValue), \
+             QtCore.QSignalBlocker(self.ui.hSliderPosTgtValue):
+            self._set_torque_slider_value(0)
+            self._set_position_slider_value(self.pluto.angle)
+        if self._mode == "TORQUE":
+            self.pluto.set_control_target(self._get_torque_slider_value())
+        elif self._mode == "POSITION":
+            self.pluto.set_control_target(self._get_position_slider_value())
+        self.pluto.set_control_type(self._mode)
         self.update_ui()
     
     def _callback_test_position_target_changed(self, event):
         # Get the current target position and send it to the device.
-        slrrange, valrange = self.get_position_slider_value_ranges()
-        _tgt = self._pos2tgt(slrrange, valrange, self.ui.hSliderPosTgtValue.value())
+        _tgt = self._pos2tgt(self._posmap, self.ui.hSliderPosTgtValue.value())
         self.pluto.set_control_target(_tgt)
         self.update_ui()
     
     def _callback_test_torque_target_changed(self, event):
         # Get the current target position and send it to the device.
-        slrrange, valrange = self.get_torque_slider_value_ranges()
-        _tgt = self._pos2tgt(slrrange, valrange, self.ui.hSliderTorqTgtValue.value())
+        _tgt = self._pos2tgt(self._torqmap, self.ui.hSliderTorqTgtValue.value())
         self.pluto.set_control_target(_tgt)
         self.update_ui()
 
@@ -169,41 +192,43 @@ class PlutoTestControlWindow(QtWidgets.QMainWindow):
              pdef.PlutoTargetRanges["POSITION"][1])
         )
     
-    def _tgt2pos(self, sldrrange, valrange, value):
+    def _get_linear_maps(self, sldrrange, valrange):
+        # (output min, output span, input min, input span) of the slider
+        # position to target value map, and of its inverse.
+        _mins, _maxs = sldrrange
+        _minv, _maxv = valrange
+        return (
+            (_minv, _maxv - _minv, _mins, _maxs - _mins),
+            (_mins, _maxs - _mins, _minv, _maxv - _minv)
+        )
+
+    def _tgt2pos(self, invmap, value):
         # Make sure this is not called by mistake for no control selection.
-        if not (self.ui.radioTorque.isChecked()
-                or self.ui.radioPosition.isChecked()):
+        if self._mode == "NONE":
             return 0
         # Make the convesion
-        _mins, _maxs = sldrrange
-        _minv, _maxv = valrange
-        return int(_mins + (_maxs - _mins) * (value - _minv) / (_maxv - _minv))
+        _mins, _spans, _minv, _spanv = invmap
+        return int(_mins + _spans * (value - _minv) / _spanv)
 
-    def _pos2tgt(self, sldrrange, valrange, value):
+    def _pos2tgt(self, posmap, value):
         # Make sure this is not called by mistake for no control selection.
-        if not (self.ui.radioTorque.isChecked()
-                or self.ui.radioPosition.isChecked()):
+        if self._mode == "NONE":
             return 0
         # Make the convesion
-        _mins, _maxs = sldrrange
-        _minv, _maxv = valrange
-        return _minv + (_maxv - _minv) * (value - _mins) / (_maxs - _mins)
+        _minv, _spanv, _mins, _spans = posmap
+        return _minv + _spanv * (value - _mins) / _spans
 
     def _get_torque_slider_value(self):
-        slrrange, valrange = self.get_torque_slider_value_ranges()
-        return self._pos2tgt(slrrange, valrange, self.ui.hSliderPosTgtValue.value())
+        return self._pos2tgt(self._torqmap, self.ui.hSliderTorqTgtValue.value())
     
     def _set_torque_slider_value(self, value):
-        slrrange, valrange = self.get_torque_slider_value_ranges()
-        self.ui.hSliderTorqTgtValue.setValue(self._tgt2pos(slrrange, valrange, value))
+        self.ui.hSliderTorqTgtValue.setValue(self._tgt2pos(self._torqinvmap, value))
 
     def _get_position_slider_value(self):
-        slrrange, valrange = self.get_position_slider_value_ranges()
-        return self._pos2tgt(slrrange, valrange, self.ui.hSliderPosTgtValue.value())
+        return self._pos2tgt(self._posmap, self.ui.hSliderPosTgtValue.value())
     
     def _set_position_slider_value(self, value):
-        slrrange, valrange = self.get_position_slider_value_ranges()
-        self.ui.hSliderPosTgtValue.setValue(self._tgt2pos(slrrange, valrange, value))
+        self.ui.hSliderPosTgtValue.setValue(self._tgt2pos(self._posinvmap, value))
 
 if __name__ == '__main__':
     app = QtWidgets.QApplication(sys.argv)
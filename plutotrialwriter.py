@@ -0,0 +1,126 @@
+"""
+Module for writing the PLUTO trial data files from a background thread.
+
+Author: Sivakumar Balasubramanian
+Date: 17 October 2026
+Email: siva82kb@gmail.com
+"""
+
+
+import os
+import queue
+import threading
+
+
+# Module level constants
+TRIAL_FILE_BUFFER_SIZE = 128 * 1024  # Buffer size for the trial data file
+TRIAL_WRITER_BATCH_SIZE = 64  # No. of writes batched into one queue item
+
+
+class PlutoTrialDataWriter():
+    """
+    Class for writing the trial data file from a background thread, so that
+    the file I/O does not hold up the handling of PLUTO data on the GUI
+    thread. The write, writelines, flush and close methods can be used in
+    place of those of the file object. Writes are batched and passed to the
+    writer thread, which encodes them and writes them to the file opened in
+    binary mode. Pending writes are passed on push, flush and close. close
+    does not wait for the file to be closed; use join for that. An error in
+    the writer thread stops the writing and is raised by the next write,
+    flush or close, and is available from error.
+    """
+    _FLUSH = object()
+    _CLOSE = object()
+
+    def __init__(self, fname, batchsize=TRIAL_WRITER_BATCH_SIZE):
+        self._fhandle = open(fname, "wb", buffering=TRIAL_FILE_BUFFER_SIZE)
+        # The queue is unbounded, so that no trial data is dropped when the
+        # disk is slow.
+        self._queue = queue.Queue()
+        self._batch = []
+        self._batchsize = batchsize
+        self._closed = False
+        self._error = None
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._thread.start()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    @property
+    def error(self):
+        return self._error
+
+    def write(self, data):
+        if self._closed:
+            raise ValueError("I/O operation on closed trial data file.")
+        if self._error is not None:
+            raise self._error
+        self._batch.append(data)
+        if len(self._batch) >= self._batchsize:
+            self._submit_batch()
+
+    def writelines(self, lines):
+        self.write("".join(lines))
+
+    def push(self):
+        # Pass the pending writes to the writer thread without flushing the
+        # file.
+        if self._closed or self._error is not None:
+            return
+        self._submit_batch()
+
+    def flush(self):
+        if self._closed:
+            raise ValueError("I/O operation on closed trial data file.")
+        if self._error is not None:
+            raise self._error
+        self._submit_batch()
+        self._queue.put(self._FLUSH)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._error is not None:
+            raise self._error
+        self._submit_batch()
+        # The writer thread flushes, syncs and closes the file.
+        self._queue.put(self._CLOSE)
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def _submit_batch(self):
+        if not self._batch:
+            return
+        self._queue.put(self._batch)
+        self._batch = []
+
+    def _writer_loop(self):
+        while True:
+            _data = self._queue.get()
+            try:
+                if _data is self._FLUSH:
+                    self._fhandle.flush()
+                elif _data is self._CLOSE:
+                    # Make sure the trial data is on disk before closing.
+                    self._fhandle.flush()
+                    os.fsync(self._fhandle.fileno())
+                    self._fhandle.close()
+                    return
+                else:
+                    # Join and encode the batch here, off the caller's thread.
+                    self._fhandle.write("".join(_data).encode())
+            except (OSError, ValueError) as e:
+                # Keep the error for the caller and stop writing.
+                self._error = e
+                try:
+                    self._fhandle.close()
+                except (OSError, ValueError):
+                    pass
+                return
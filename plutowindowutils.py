@@ -0,0 +1,89 @@
+"""
+Module containing helpers shared by the PLUTO assessment windows.
+
+Author: Sivakumar Balasubramanian
+Date: 17 October 2026
+Email: siva82kb@gmail.com
+"""
+
+
+import numpy as np
+
+from PyQt5 import (
+    QtCore,
+    QtWidgets,
+)
+import pyqtgraph as pg
+
+
+# Module level constants
+CURSOR_Y = (-30, 30, -30, 30)  # Y coordinates of the cursor line pair
+
+
+def create_hoc_graph(container):
+    """Creates the plot widget for displaying HOC movements in the given
+    container widget.
+    """
+    _pgobj = pg.PlotWidget()
+    _templayout = QtWidgets.QGridLayout()
+    _templayout.addWidget(_pgobj)
+    container.setLayout(_templayout)
+    _pgobj.setYRange(-20, 20)
+    _pgobj.setXRange(-10, 10)
+    _pgobj.getAxis('bottom').setStyle(showValues=False)
+    _pgobj.getAxis('left').setStyle(showValues=False)
+    # The cursors are redrawn at the data rate; keep antialiasing off.
+    _pgobj.setAntialiasing(False)
+    return _pgobj
+
+
+class TimedUIUpdate():
+    """
+    Mixin for windows that redraw their UI from a timer. Events set _uidirty,
+    and update_ui is called on the next tick of the UI timer.
+    """
+    def _init_ui_timer(self, interval=None):
+        self._uidirty = False
+        self._uitimer = QtCore.QTimer(self)
+        self._uitimer.timeout.connect(self._maybe_update_ui)
+        if interval is not None:
+            self._uitimer.start(interval)
+
+    def _maybe_update_ui(self):
+        if self._uidirty:
+            self._uidirty = False
+            self.update_ui()
+
+
+class HocCursor():
+    """
+    Class for a cursor on the HOC graph, drawn as a pair of vertical lines
+    mirrored about zero. The lines are a single plot item whose coordinate
+    buffers are updated in place.
+    """
+    __slots__ = ("_x", "_y", "_line")
+
+    def __init__(self, pgobj, pen, pos=0.0):
+        self._x = np.array([pos, pos, -pos, -pos], dtype=np.float64)
+        self._y = np.array(CURSOR_Y, dtype=np.float64)
+        # The cursor data is always finite.
+        self._line = pg.PlotDataItem(
+            self._x,
+            self._y,
+            connect='pairs',
+            skipFiniteCheck=True,
+            pen=pen
+        )
+        pgobj.addItem(self._line)
+
+    @property
+    def line(self):
+        return self._line
+
+    def set_position(self, pos):
+        # Nothing to redraw if the line is already at this position.
+        if self._x[0] == pos:
+            return
+        self._x[:2] = pos
+        self._x[2:] = -pos
+        self._line.setData(self._x, self._y)
@@ -16,7 +16,13 @@ from PyQt5.QtCore import (pyqtSignal, pyqtSlot, QThread)
 _INDEBUG = False
 _OUTDEBUG = False
 
-class JediParsingStates(enum.Enum):
+# Serial read timeout (s). The reader thread blocks for at most this long
+# waiting for new data, instead of polling the port in a busy loop.
+READ_TIMEOUT = 0.1
+# Poll interval (ms) of the reader thread while it is sleeping.
+SLEEP_POLL_INTERVAL = 10
+
+class JediParsingStates(enum.IntEnum):
     LookingForHeader = 0
     FoundHeader1 = 1
     FoundHeader2 = 2
@@ -25,6 +31,15 @@ class JediParsingStates(enum.Enum):
     FoundFullPacket = 5
 
 
+# Parsing states as plain ints, for the per-byte comparisons in the parser.
+_LOOKING_FOR_HEADER = int(JediParsingStates.LookingForHeader)
+_FOUND_HEADER1 = int(JediParsingStates.FoundHeader1)
+_FOUND_HEADER2 = int(JediParsingStates.FoundHeader2)
+_READING_PAYLOAD = int(JediParsingStates.ReadingPayload)
+_CHECK_CHECKSUM = int(JediParsingStates.CheckCheckSum)
+_FOUND_FULL_PACKET = int(JediParsingStates.FoundFullPacket)
+
+
 class JediComm(QThread):
 
     newdata_signal = pyqtSignal(list)
@@ -33,7 +48,9 @@ class JediComm(QThread):
         super().__init__()
         self._port = port
         self._baudrate = baudrate
-        self._ser = serial.Serial(port) if baudrate is None else serial.Serial(port, baudrate)
+        self._ser = (serial.Serial(port, timeout=READ_TIMEOUT)
+                     if baudrate is None
+                     else serial.Serial(port, baudrate, timeout=READ_TIMEOUT))
         self._state = JediParsingStates.LookingForHeader
         self._in_payload = []
         self._out_payload = []
@@ -60,31 +77,45 @@ class JediComm(QThread):
         return self._port if self._ser.is_open else ""
 
     def send_message(self, outbytes):
+        self._ser.write(self._frame_message(outbytes))
+
+    def send_messages(self, outbyteslist):
+        """Sends the given list of messages with a single write to the port.
+        """
+        self._ser.write(b"".join(self._frame_message(_outbytes)
+                                 for _outbytes in outbyteslist))
+
+    def _frame_message(self, outbytes):
         _outpayload = [0xAA, 0xAA, len(outbytes)+1, *outbytes]
         _outpayload.append(sum(_outpayload) % 256)
-        # Send payload.
         if _OUTDEBUG:
             sys.stdout.write("\n Out data: ")
             for _elem in _outpayload:
                 sys.stdout.write(f"{_elem} ")
-        self._ser.write(bytearray(_outpayload))
+        return bytearray(_outpayload)
 
     def run(self):
         """
         Thread operation.
         """
         self._state = JediParsingStates.LookingForHeader
-        while True and self._ser.isOpen():
-            # check if the currently paused
-            if self._sleeping:
-                # wait till the thread is un-paused.
-                continue
-
-            # abort?
-            if self._abort is True:
-                return
-
-            self._read_handle_data()
+        try:
+            while True and self._ser.isOpen():
+                # check if the currently paused
+                if self._sleeping:
+                    # wait till the thread is un-paused.
+                    self.msleep(SLEEP_POLL_INTERVAL)
+                    continue
+
+                # abort?
+                if self._abort is True:
+                    return
+
+                self._read_handle_data()
+        finally:
+            # The port is closed by this thread, so that it is never closed
+            # during a read.
+            self._ser.close()
 
     def sleep(self):
         """
@@ -104,59 +135,66 @@ class JediComm(QThread):
         Aborts the current thread.
         """
         self._abort = True
-        self._ser.close()
         if self._sleeping:
             self.wakeup()
+        # Wait for the thread to finish its read and close the port.
+        if self.isRunning():
+            self.wait()
+        self._ser.close()
 
     def _read_handle_data(self):
         """
         Reads and handles the received data by calling the inform function.
         """
-        # Read full packets.
-        if self._ser.inWaiting() and _INDEBUG:
-            sys.stdout.write("\n New data: ")
+        # Read all the bytes waiting in the port, blocking till at least one
+        # byte arrives or the read times out.
         try:
-            while self._ser.inWaiting():
-                _byte = self._ser.read()
-                if  _INDEBUG:
-                    sys.stdout.write(f"{ord(_byte)} ")
-                if self._state == JediParsingStates.LookingForHeader:
-                    if ord(_byte) == 0xff:
-                        self._state = JediParsingStates.FoundHeader1
-                elif self._state == JediParsingStates.FoundHeader1:
-                    if ord(_byte) == 0xff:
-                        self._state = JediParsingStates.FoundHeader2
-                    else:
-                        self._state = JediParsingStates.LookingForHeader
-                elif self._state == JediParsingStates.FoundHeader2:
-                    # Payload size cannot be zero.
-                    if ord(_byte) == 0:
-                        self._state = JediParsingStates.LookingForHeader
-                        continue
-                    # Payload size is not zero.
-                    self._N = ord(_byte)
-                    self._cnt = 0
-                    self._chksum = 255 + 255 + self._N
-                    self._in_payload = [ None ] * (self._N - 1)
-                    self._state = JediParsingStates.ReadingPayload
-                elif self._state == JediParsingStates.ReadingPayload:
-                    self._in_payload[self._cnt] = ord(_byte)
-                    self._chksum += ord(_byte)
-                    self._cnt += 1
-                    if self._cnt == self._N - 1:
-                        self._state = JediParsingStates.CheckCheckSum
-                elif self._state == JediParsingStates.CheckCheckSum:
-                    if self._chksum % 256 == ord(_byte):
-                        self._state = JediParsingStates.FoundFullPacket
-                    else:
-                        self._state = JediParsingStates.LookingForHeader
-                
-                # Handle full packet.
-                if self._state == JediParsingStates.FoundFullPacket:
-                    self.newdata_signal.emit(self._in_payload)
-                    self._state = JediParsingStates.LookingForHeader
+            _bytes = self._ser.read(max(1, self._ser.in_waiting))
         except serial.serialutil.SerialException:
             return
+        if _bytes and _INDEBUG:
+            sys.stdout.write("\n New data: ")
+        # Parse with the state in a local, and store it back at the end.
+        _state = int(self._state)
+        for _byte in _bytes:
+            if  _INDEBUG:
+                sys.stdout.write(f"{_byte} ")
+            if _state == _LOOKING_FOR_HEADER:
+                if _byte == 0xff:
+                    _state = _FOUND_HEADER1
+            elif _state == _FOUND_HEADER1:
+                if _byte == 0xff:
+                    _state = _FOUND_HEADER2
+                else:
+                    _state = _LOOKING_FOR_HEADER
+            elif _state == _FOUND_HEADER2:
+                # Payload size cannot be zero.
+                if _byte == 0:
+                    _state = _LOOKING_FOR_HEADER
+                    continue
+                # Payload size is not zero.
+                self._N = _byte
+                self._cnt = 0
+                self._chksum = 255 + 255 + self._N
+                self._in_payload = [ None ] * (self._N - 1)
+                _state = _READING_PAYLOAD
+            elif _state == _READING_PAYLOAD:
+                self._in_payload[self._cnt] = _byte
+                self._chksum += _byte
+                self._cnt += 1
+                if self._cnt == self._N - 1:
+                    _state = _CHECK_CHECKSUM
+            elif _state == _CHECK_CHECKSUM:
+                if self._chksum % 256 == _byte:
+                    _state = _FOUND_FULL_PACKET
+                else:
+                    _state = _LOOKING_FOR_HEADER
+            
+            # Handle full packet.
+            if _state == _FOUND_FULL_PACKET:
+                self.newdata_signal.emit(self._in_payload)
+                _state = _LOOKING_FOR_HEADER
+        self._state = _state
 
 
 if __name__ == '__main__':
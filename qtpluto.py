@@ -7,7 +7,7 @@ Date: 24 July 2024
 Email: siva82kb@gmail.com
 """
 
-from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
 from qtjedi import JediComm
 from collections import deque
 from datetime import datetime
@@ -17,6 +17,19 @@ import plutodefs as pdef
 
 # Frame rate estimation window
 FR_WINDOW_N = 100
+
+# Number of floats of sensor data in a packet, for each data type code.
+SENSOR_DATA_NUMBER = {
+    pdef.OutDataType[_name]: _n
+    for _name, _n in pdef.PlutoSensorDataNumber.items()
+}
+
+# Precompiled structs for unpacking the float sensor data in a packet.
+SENSOR_DATA_STRUCTS = {
+    _n: struct.Struct(f"{_n}f")
+    for _n in set(pdef.PlutoSensorDataNumber.values())
+}
+
 class QtPluto(QObject):
     """
     Class to handle PLUTO IO operations. 
@@ -41,12 +54,18 @@ class QtPluto(QObject):
         self.dev = JediComm(port, baudrate)
         # Upacked data from PLUTO with time stamp.
         self.currstatedata = []
-        self.prevstatedata = []
         self.currsensordata = []
+        # Previous button state for detecting button events.
+        self._prevbtn = None
         # framerate related stuff
         self._currt = None
         self._prevt = None
-        self._deltimes = []
+        # Ring buffer of the last FR_WINDOW_N packet intervals, the index of
+        # the next slot to write, and the running sum of the intervals. The
+        # intervals are integer microseconds, so the running sum is exact.
+        self._deltimes = [0] * FR_WINDOW_N
+        self._deltimesinx = 0
+        self._deltimessum = 0
 
         # Call back for newdata_signal
         self.dev.newdata_signal.connect(self._callback_newdata)
@@ -56,59 +75,61 @@ class QtPluto(QObject):
 
     @property
     def time(self):
-        return self.currstatedata[0] if len(self.currstatedata) > 0 else None
+        # The packet time stamp is formatted only when it is asked for.
+        return (self.currstatedata[0].strftime('%Y-%m-%d %H:%M:%S.%f')
+                if self.currstatedata else None)
     
     @property
     def status(self):
-        return self.currstatedata[1] if len(self.currstatedata) > 0 else None
+        return self.currstatedata[1] if self.currstatedata else None
     
     @property
     def datatype(self):
-        return self.status >> 4 if len(self.currstatedata) > 0 else None
+        return self.status >> 4 if self.currstatedata else None
     
     @property
     def controltype(self):
-        return (self.status & 0x0E) >> 1 if len(self.currstatedata) > 0 else None
+        return (self.status & 0x0E) >> 1 if self.currstatedata else None
     
     @property
     def calibration(self):
-        return self.status & 0x01 if len(self.currstatedata) > 0 else None
+        return self.status & 0x01 if self.currstatedata else None
 
     @property
     def error(self):
-        return self.currstatedata[2] if len(self.currstatedata) > 0 else None
+        return self.currstatedata[2] if self.currstatedata else None
     
     @property
     def mechanism(self):
-        return self.currstatedata[3] >> 4 if len(self.currstatedata) > 0 else None
+        return self.currstatedata[3] >> 4 if self.currstatedata else None
     
     @property
     def actuated(self):
-        return self.currstatedata[3] & 0x01 if len(self.currstatedata) > 0 else None
+        return self.currstatedata[3] & 0x01 if self.currstatedata else None
     
     @property
     def button(self):
-        return self.currstatedata[4] if len(self.currstatedata) > 0 else None
+        return self.currstatedata[4] if self.currstatedata else None
     
     @property
     def angle(self):
-        return self.currsensordata[0] if len(self.currsensordata) > 0 else None
+        return self.currsensordata[0] if self.currsensordata else None
     
     @property
     def hocdisp(self):
-        return pdef.HOCScale * abs(self.currsensordata[0]) if len(self.currsensordata) > 0 else None
+        return pdef.HOCScale * abs(self.currsensordata[0]) if self.currsensordata else None
     
     @property
     def torque(self):
-        return self.currsensordata[1] if len(self.currsensordata) > 0 else None
+        return self.currsensordata[1] if self.currsensordata else None
     
     @property
     def control(self):
-        return self.currsensordata[2] if len(self.currsensordata) > 0 else None
+        return self.currsensordata[2] if self.currsensordata else None
     
     @property
     def target(self):
-        return self.currsensordata[3] if len(self.currsensordata) > 0 else None
+        return self.currsensordata[3] if self.currsensordata else None
     
     @property
     def error(self):
@@ -123,57 +144,58 @@ class QtPluto(QObject):
         return self.currsensordata[6] if len(self.currsensordata) > 6 else None
     
     def framerate(self):
-        return FR_WINDOW_N / sum(self._deltimes) if sum(self._deltimes) != 0 else 0.0
+        return FR_WINDOW_N * 1e6 / self._deltimessum if self._deltimessum != 0 else 0.0
  
     def is_connected(self):
         return self.dev.is_open()
     
     def is_data_available(self):
-        return len(self.currstatedata) != 0
+        return bool(self.currstatedata)
 
+    @pyqtSlot(list)
     def _callback_newdata(self, newdata):
         """
         Handles newdata packect recevied through the COM port.
         """
-        # Store previous data
-        self.prevstatedata = self.currstatedata
         # Unpack and update current data
         self._currt = datetime.now()
-        self.currstatedata = [self._currt.strftime('%Y-%m-%d %H:%M:%S.%f')]
-        # status
-        self.currstatedata.append(newdata[0])
-        # error
-        self.currstatedata.append(255 * newdata[2] + newdata[1])
-        # actuated
-        self.currstatedata.append(newdata[3])
         # Robot sensor data. This depends on the datatype.
-        N = pdef.PlutoSensorDataNumber[pdef.get_name(pdef.OutDataType, self.datatype)]
-        # pluto button
-        self.currstatedata.append(newdata[(N + 1) * 4])
+        N = SENSOR_DATA_NUMBER[newdata[0] >> 4]
+        self.currstatedata = [
+            self._currt,
+            # status
+            newdata[0],
+            # error
+            255 * newdata[2] + newdata[1],
+            # actuated
+            newdata[3],
+            # pluto button
+            newdata[(N + 1) * 4]
+        ]
 
         # pluto sensor data
-        self.currsensordata = [
-            struct.unpack('f', bytes(newdata[i:i+4]))[0]
-            for i in range(4, (N + 1) * 4, 4)
-        ]
+        self.currsensordata = SENSOR_DATA_STRUCTS[N].unpack(
+            bytes(newdata[4:(N + 1) * 4])
+        )
 
         # Update frame rate related data.
         if self._prevt is not None:
-            _delt = (self._currt - self._prevt).microseconds * 1e-6
-            self._deltimes.append(_delt)
-            if len(self._deltimes) > FR_WINDOW_N:
-                self._deltimes.pop(0)
+            _delt = (self._currt - self._prevt).microseconds
+            self._deltimessum += _delt - self._deltimes[self._deltimesinx]
+            self._deltimes[self._deltimesinx] = _delt
+            self._deltimesinx = (self._deltimesinx + 1) % FR_WINDOW_N
         self._prevt = self._currt
         
         # Emit newdata signal for other listeners
         self.newdata.emit()
         
         # Check and verify button events.
-        if len(self.currstatedata) > 0 and len(self.prevstatedata) > 0:    
-            if self.prevstatedata[4] == 1.0 and self.currstatedata[4] == 0.0:
-                self.btnpressed.emit()
-            if self.prevstatedata[4] == 0.0 and self.currstatedata[4] == 1.0:
-                self.btnreleased.emit()
+        _btn = self.currstatedata[4]
+        if self._prevbtn == 1.0 and _btn == 0.0:
+            self.btnpressed.emit()
+        if self._prevbtn == 0.0 and _btn == 1.0:
+            self.btnreleased.emit()
+        self._prevbtn = _btn
 
     def calibrate(self, mech):
         """Function to set the encoder calibration.
@@ -203,6 +225,18 @@ class QtPluto(QObject):
         _payload += list(struct.pack('f', target))
         self.dev.send_message(_payload)
 
+    def set_control_type_target(self, control, target):
+        """Function to set the control type and the controller target
+        position with a single write to the device.
+        """
+        if not self.is_connected():
+            return
+        _payloads = [
+            [pdef.InDataType["SET_CONTROL_TYPE"], pdef.ControlType[control]],
+            [pdef.InDataType["SET_CONTROL_TARGET"], *struct.pack('f', target)]
+        ]
+        self.dev.send_messages(_payloads)
+
     def start_sensorstream(self):
         """Starts sensor stream.
         """